@@ -0,0 +1,608 @@
+"""
+NAVO RADIO — офлайн-бенчмарк эфира (регрессионный гейт для работы над производительностью).
+Без сети: локальный Jamendo (HTTP, сгенерированные MP3), заглушки Groq и Edge TTS с задержкой
+и долей отказов, приёмник протокола источника Icecast, который декодирует поток и ставит
+метки времени. main.py работает как обычно — по расписанию со сдвинутыми часами или в FORCE_MUSIC.
+
+Отчёт: тишина в эфире, время до первого байта/звука, паузы между элементами (p50/p95/max),
+CPU и пиковый RSS (процесс + FFmpeg) на час аудио. Пороги --max-* → код выхода 1.
+
+    python bench.py --minutes 5
+    python bench.py --minutes 10 --start-at 08:59:30 --tts-latency 1.5 --groq-fail 0.2
+    python bench.py --minutes 5 --json report.json --max-dead-air 2 --max-ttfa 10
+"""
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+# Анализ принятого потока: моно PCM 8 кГц, окна по 50 мс
+_RATE = 8000
+_WINDOW = _RATE // 20
+# Окно тише порога (RMS, dBFS) — тишина
+_SILENCE_DB = -55.0
+# Паузы короче — склейка кадров кодека, не пауза между элементами
+_MIN_GAP = 0.1
+# Паузы длиннее — «мёртвый эфир»
+_DEAD_AIR_MIN = 0.5
+_SAMPLE_PERIOD = 1.0
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK")
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def _ffmpeg() -> str:
+    return os.getenv("FFMPEG_PATH") or "ffmpeg"
+
+
+def _tone(path: Path, seconds: float, freq: int, bitrate: int = 128) -> Path:
+    """Синусоида в MP3 — вместо музыки и голоса; паузы внутри нет, значит, любая тишина — от эфира."""
+    subprocess.run(
+        [_ffmpeg(), "-y", "-hide_banner", "-loglevel", "error",
+         "-f", "lavfi", "-i", f"sine=frequency={freq}:duration={seconds}",
+         "-ac", "1", "-ar", "44100", "-b:a", f"{bitrate}k", str(path)],
+        check=True,
+    )
+    return path
+
+
+def _jitter(mean: float) -> float:
+    return random.uniform(0.5, 1.5) * mean if mean > 0 else 0.0
+
+
+# --- Jamendo ---
+
+
+class _FakeJamendo(BaseHTTPRequestHandler):
+    """/v3.0/tracks — страницы каталога в формате Jamendo; /audio/<id>.mp3 — файлы (с Range)."""
+    protocol_version = "HTTP/1.1"
+    catalog_size = 200
+    track_seconds = 30.0
+    latency = 0.0
+    fail_rate = 0.0
+    files: list[Path] = []
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _fail(self) -> bool:
+        time.sleep(_jitter(self.latency))
+        if random.random() < self.fail_rate:
+            self.send_error(503)
+            return True
+        return False
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path.startswith("/audio/"):
+            self._audio(url.path.rsplit("/", 1)[-1].split(".")[0])
+        elif url.path.endswith("/tracks"):
+            self._tracks(parse_qs(url.query))
+        else:
+            self.send_error(404)
+
+    def _tracks(self, query: dict[str, list[str]]) -> None:
+        if self._fail():
+            return
+        limit = int(query.get("limit", ["50"])[0])
+        offset = int(query.get("offset", ["0"])[0])
+        tag = query.get("tags", ["world"])[0]
+        host = f"http://{self.headers.get('Host')}"
+        results = [
+            {
+                "id": f"{tag}{i}",
+                "name": f"Bench {tag} {i}",
+                "artist_name": f"Artist {i % 17}",
+                "album_name": f"Album {i % 5}",
+                "duration": int(self.track_seconds),
+                "audio": f"{host}/audio/{tag}{i}.mp3",
+            }
+            for i in range(offset, min(offset + limit, self.catalog_size))
+        ]
+        body = json.dumps({"headers": {"status": "success"}, "results": results}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _audio(self, track_id: str) -> None:
+        if self._fail():
+            return
+        data = self.files[zlib.crc32(track_id.encode()) % len(self.files)].read_bytes()
+        start = 0
+        m = re.match(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        if m and int(m.group(1)) < len(data):
+            start = int(m.group(1))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(len(data) - start))
+        self.end_headers()
+        self.wfile.write(data[start:])
+
+
+# --- Groq / TTS ---
+
+
+def _install_stubs(args: argparse.Namespace, voices: list[Path]) -> None:
+    """
+    Подменяем только транспорт (_chat, _edge_tts): кэши, пачки интро, fallback'и
+    и потоковая речь — настоящий код.
+    """
+    import asyncio
+
+    from services import groq_client, news_block, tts, weather_block
+
+    def chat(prompt: str, max_tokens: int, temperature: float, json_mode: bool = False) -> str:
+        with groq_client.STAGE_SECONDS.time(stage="groq"):
+            time.sleep(_jitter(args.groq_latency))
+            if random.random() < args.groq_fail:
+                raise RuntimeError("bench: отказ Groq")
+        if json_mode:
+            ids = re.findall(r"^- id=([^:]+):", prompt, re.M)
+            return json.dumps({"intros": [{"id": i, "text": f"Интро для трека {i}."} for i in ids]})
+        return "Тестовый текст для озвучки. " * 3
+
+    async def edge_tts(text: str, output_path: Path, sink=None) -> None:
+        await asyncio.sleep(_jitter(args.tts_latency))
+        if random.random() < args.tts_fail:
+            raise RuntimeError("bench: отказ TTS")
+        data = voices[min(len(text) // 80, len(voices) - 1)].read_bytes()
+        with open(output_path, "wb") as f:
+            # Кусками, как отдаёт Edge TTS при потоковом синтезе
+            for i in range(0, len(data), 4096):
+                f.write(data[i:i + 4096])
+                if sink is not None:
+                    sink(data[i:i + 4096])
+                    await asyncio.sleep(0.01)
+
+    groq_client._chat = chat
+    tts._edge_tts = edge_tts
+    news_block.fetch_news_text = lambda: "Заголовок. Краткое содержание новости."
+    weather_block.fetch_weather_data = lambda: "Город: Душанбе. Температура 20°C. Ясно."
+
+
+def _shift_clock(start_at: str) -> None:
+    """Часы расписания идут с указанного времени (HH:MM[:SS] по Москве) — граница часа наступает в тесте."""
+    import scheduler
+
+    real = scheduler.get_moscow_now
+    now = real()
+    parts = [int(p) for p in start_at.split(":")] + [0]
+    target = now.replace(hour=parts[0], minute=parts[1], second=parts[2], microsecond=0)
+    if target < now:
+        target += timedelta(days=1)
+    offset = target - now
+    scheduler.get_moscow_now = lambda: real() + offset
+
+
+# --- Icecast ---
+
+
+class _Timeline:
+    """Метки времени одного подключения источника: первый байт, тишина по окнам."""
+
+    def __init__(self, mount: str, t0: float):
+        self.mount = mount
+        self.connected_at = time.monotonic() - t0
+        self.first_byte_at: float | None = None
+        self.first_audio: float | None = None  # сек потока
+        self.closed_at: float | None = None
+        self.samples = 0
+        self.gaps: list[float] = []
+        self._silent_from: int | None = None
+        self._rest = b""
+
+    @property
+    def seconds(self) -> float:
+        return self.samples / _RATE
+
+    def feed(self, pcm: bytes) -> None:
+        buf = self._rest + pcm
+        n = len(buf) // (2 * _WINDOW) * (2 * _WINDOW)
+        self._rest = buf[n:]
+        if not n:
+            return
+        samples = np.frombuffer(buf[:n], dtype=np.int16)
+        windows = samples.astype(np.float32).reshape(-1, _WINDOW) / 32768.0
+        rms_db = 10 * np.log10(np.mean(windows * windows, axis=1) + 1e-12)
+        for silent in rms_db < _SILENCE_DB:
+            if silent:
+                if self._silent_from is None:
+                    self._silent_from = self.samples
+            else:
+                if self.first_audio is None:
+                    self.first_audio = self.samples / _RATE
+                elif self._silent_from is not None:
+                    self._gap(self.samples - self._silent_from)
+                self._silent_from = None
+            self.samples += _WINDOW
+
+    def close(self, t0: float) -> None:
+        self.closed_at = time.monotonic() - t0
+        # Тишина в конце подключения (после первого звука) — тоже пауза
+        if self.first_audio is not None and self._silent_from is not None:
+            self._gap(self.samples - self._silent_from)
+            self._silent_from = None
+
+    def _gap(self, samples: int) -> None:
+        if samples / _RATE >= _MIN_GAP:
+            self.gaps.append(samples / _RATE)
+
+
+class _IcecastSink(socketserver.ThreadingTCPServer):
+    """Принимает PUT/SOURCE источника (ffmpeg icecast://) и /admin/metadata (ICY)."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, t0: float):
+        super().__init__(("127.0.0.1", 0), _SinkHandler)
+        self.t0 = t0
+        self.timelines: list[_Timeline] = []
+        self.titles: list[tuple[float, str]] = []
+        self.lock = threading.Lock()
+        # Декодеры приёмника — нагрузка бенчмарка, из CPU/RSS эфира исключаются
+        self.decoders: set[int] = set()
+        self.decoder_cpu = 0.0
+
+
+_DECODE_FORMATS = {"audio/mpeg": "mp3", "audio/ogg": "ogg", "audio/aac": "aac"}
+
+
+class _SinkHandler(socketserver.BaseRequestHandler):
+    server: _IcecastSink
+
+    def handle(self) -> None:
+        sock: socket.socket = self.request
+        head = b""
+        while b"\r\n\r\n" not in head:
+            chunk = sock.recv(4096)
+            if not chunk:
+                return
+            head += chunk
+        head, body = head.split(b"\r\n\r\n", 1)
+        lines = head.decode("latin-1").split("\r\n")
+        method, target = lines[0].split(" ")[:2]
+        headers = {k.strip().lower(): v.strip() for k, _, v in (ln.partition(":") for ln in lines[1:])}
+
+        if target.startswith("/admin/metadata"):
+            song = parse_qs(urlparse(target).query).get("song", [""])[0]
+            with self.server.lock:
+                self.server.titles.append((round(time.monotonic() - self.server.t0, 3), song))
+            reply = b"<?xml version=\"1.0\"?><iceresponse><return>1</return></iceresponse>"
+            sock.sendall(b"HTTP/1.0 200 OK\r\nContent-Type: text/xml\r\nContent-Length: %d\r\n\r\n%s" % (len(reply), reply))
+            return
+        if method not in ("PUT", "SOURCE"):
+            sock.sendall(b"HTTP/1.0 405 Method Not Allowed\r\n\r\n")
+            return
+
+        if "100-continue" in headers.get("expect", "").lower():
+            sock.sendall(b"HTTP/1.1 100 Continue\r\n\r\n")
+        else:
+            sock.sendall(b"HTTP/1.0 200 OK\r\n\r\n")
+        self._receive(sock, target.lstrip("/"), headers.get("content-type", "audio/mpeg"), body)
+
+    def _receive(self, sock: socket.socket, mount: str, content_type: str, body: bytes) -> None:
+        timeline = _Timeline(mount, self.server.t0)
+        with self.server.lock:
+            self.server.timelines.append(timeline)
+        cmd = [_ffmpeg(), "-hide_banner", "-loglevel", "error"]
+        if content_type in _DECODE_FORMATS:
+            cmd += ["-f", _DECODE_FORMATS[content_type]]
+        cmd += ["-i", "pipe:0", "-f", "s16le", "-ac", "1", "-ar", str(_RATE), "pipe:1"]
+        dec = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        with self.server.lock:
+            self.server.decoders.add(dec.pid)
+
+        def analyze() -> None:
+            while chunk := dec.stdout.read1(65536):
+                timeline.feed(chunk)
+
+        reader = threading.Thread(target=analyze, name=f"sink-{mount}", daemon=True)
+        reader.start()
+        try:
+            while True:
+                if body:
+                    if timeline.first_byte_at is None:
+                        timeline.first_byte_at = time.monotonic() - self.server.t0
+                    dec.stdin.write(body)
+                    dec.stdin.flush()
+                body = sock.recv(65536)
+                if not body:
+                    break
+        except OSError:
+            pass
+        finally:
+            try:
+                dec.stdin.close()
+            except OSError:
+                pass
+            reader.join(timeout=5)
+            self._reap(dec)
+            timeline.close(self.server.t0)
+
+    def _reap(self, dec: subprocess.Popen) -> None:
+        """Дождаться декодера, запомнив его CPU (у зомби /proc/<pid>/stat ещё доступен)."""
+        try:
+            os.waitid(os.P_PID, dec.pid, os.WEXITED | os.WNOWAIT)
+            st = _proc_stat(dec.pid)
+        except ChildProcessError:
+            st = None
+        with self.server.lock:
+            self.server.decoders.discard(dec.pid)
+            self.server.decoder_cpu += st[1] if st else 0.0
+        dec.wait()
+
+
+# --- CPU / RSS ---
+
+
+def _proc_stat(pid: int) -> tuple[int, float, int] | None:
+    """(ppid, cpu сек, rss байт) из /proc; None — процесса уже нет."""
+    try:
+        raw = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return None
+    fields = raw[raw.rfind(")") + 2:].split()
+    # Поля после имени процесса, считая с state (3): ppid — 4, utime/stime — 14/15, rss (страницы) — 24
+    return int(fields[1]), (int(fields[11]) + int(fields[12])) / _CLK_TCK, int(fields[21]) * _PAGE_SIZE
+
+
+class _ResourceSampler:
+    """Раз в секунду: CPU всех потомков (по последнему замеру) и пиковый суммарный RSS."""
+
+    def __init__(self, sink: "_IcecastSink"):
+        self.sink = sink
+        self.cpu: dict[int, float] = {}
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bench-sampler", daemon=True)
+        self._thread.start()
+
+    def descendants(self) -> list[int]:
+        parents: dict[int, list[int]] = {}
+        for entry in os.listdir("/proc"):
+            if entry.isdigit() and (st := _proc_stat(int(entry))):
+                parents.setdefault(st[0], []).append(int(entry))
+        found, stack = [], [os.getpid()]
+        while stack:
+            kids = parents.get(stack.pop(), [])
+            found += kids
+            stack += kids
+        return found
+
+    def _run(self) -> None:
+        while not self._stop.wait(_SAMPLE_PERIOD):
+            self.sample()
+
+    def sample(self) -> None:
+        rss = _proc_stat(os.getpid())[2]
+        with self.sink.lock:
+            skip = set(self.sink.decoders)
+        for pid in self.descendants():
+            if pid not in skip and (st := _proc_stat(pid)):
+                self.cpu[pid] = st[1]
+                rss += st[2]
+        self.peak_rss = max(self.peak_rss, rss)
+
+    def stop(self) -> float:
+        """Остановить замеры; вернуть CPU, сек: сам процесс + потомки, без декодеров приёмника."""
+        self._stop.set()
+        self.sample()
+        alive = set(self.descendants())
+        t = os.times()
+        # Завершённые дочерние процессы учтены ядром (children_*), живые — по последнему замеру
+        with self.sink.lock:
+            reaped = self.sink.decoder_cpu
+        return t.user + t.system + t.children_user + t.children_system - reaped + sum(
+            cpu for pid, cpu in self.cpu.items() if pid in alive
+        )
+
+
+# --- отчёт ---
+
+
+def _percentile(values: list[float], q: float) -> float:
+    return round(float(np.percentile(values, q)), 3) if values else 0.0
+
+
+def _report(sink: _IcecastSink, cpu: float, peak_rss: int, wall: float) -> dict:
+    mounts: dict[str, dict] = {}
+    for mount in sorted({t.mount for t in sink.timelines}):
+        lines = [t for t in sink.timelines if t.mount == mount]
+        first = lines[0]
+        gaps = [g for t in lines for g in t.gaps]
+        # Между переподключениями слушатели ничего не получают — это тоже мёртвый эфир
+        offline = sum(
+            max(0.0, nxt.connected_at - (cur.closed_at or nxt.connected_at))
+            for cur, nxt in zip(lines, lines[1:])
+        )
+        audio = sum(t.seconds for t in lines)
+        mounts[mount] = {
+            "connections": len(lines),
+            "ttfb_seconds": round(first.first_byte_at, 3) if first.first_byte_at is not None else None,
+            "ttfa_seconds": (
+                round(first.first_byte_at + first.first_audio, 3)
+                if first.first_byte_at is not None and first.first_audio is not None else None
+            ),
+            "audio_seconds": round(audio, 1),
+            "dead_air_seconds": round(sum(g for g in gaps if g >= _DEAD_AIR_MIN) + offline, 2),
+            "offline_seconds": round(offline, 2),
+            "gaps": {
+                "count": len(gaps),
+                "p50": _percentile(gaps, 50),
+                "p95": _percentile(gaps, 95),
+                "max": round(max(gaps), 3) if gaps else 0.0,
+            },
+        }
+    audio_hours = max((m["audio_seconds"] for m in mounts.values()), default=0) / 3600
+    return {
+        "wall_seconds": round(wall, 1),
+        "mounts": mounts,
+        "titles": len(sink.titles),
+        "cpu_seconds": round(cpu, 2),
+        "cpu_seconds_per_audio_hour": round(cpu / audio_hours, 1) if audio_hours else None,
+        "peak_rss_mb": round(peak_rss / 2**20, 1),
+    }
+
+
+def _print_report(report: dict) -> None:
+    print("\n=== NAVO RADIO bench ===")
+    print(f"Время теста: {report['wall_seconds']} с, смен заголовка (ICY): {report['titles']}")
+    for mount, m in report["mounts"].items():
+        g = m["gaps"]
+        print(f"/{mount}: подключений {m['connections']}, аудио {m['audio_seconds']} с")
+        print(f"  первый байт {m['ttfb_seconds']} с, первый звук {m['ttfa_seconds']} с")
+        print(f"  мёртвый эфир {m['dead_air_seconds']} с (без источника {m['offline_seconds']} с)")
+        print(f"  паузы: {g['count']} шт, p50 {g['p50']} с, p95 {g['p95']} с, max {g['max']} с")
+    print(f"CPU: {report['cpu_seconds']} с, на час аудио {report['cpu_seconds_per_audio_hour']} с")
+    print(f"Пиковый RSS (с FFmpeg): {report['peak_rss_mb']} МБ")
+
+
+def _check(report: dict, args: argparse.Namespace) -> list[str]:
+    failures = []
+    if not report["mounts"]:
+        return ["источник ни разу не подключился"]
+    for mount, m in report["mounts"].items():
+        if args.max_dead_air is not None and m["dead_air_seconds"] > args.max_dead_air:
+            failures.append(f"/{mount}: мёртвый эфир {m['dead_air_seconds']} с > {args.max_dead_air}")
+        if args.max_ttfa is not None and (m["ttfa_seconds"] is None or m["ttfa_seconds"] > args.max_ttfa):
+            failures.append(f"/{mount}: первый звук {m['ttfa_seconds']} с > {args.max_ttfa}")
+        if args.max_gap_p95 is not None and m["gaps"]["p95"] > args.max_gap_p95:
+            failures.append(f"/{mount}: p95 паузы {m['gaps']['p95']} с > {args.max_gap_p95}")
+    limit, value = args.max_cpu_per_hour, report["cpu_seconds_per_audio_hour"]
+    if limit is not None and value is not None and value > limit:
+        failures.append(f"CPU на час аудио {value} с > {limit}")
+    return failures
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Офлайн-бенчмарк эфира NAVO RADIO")
+    p.add_argument("--minutes", type=float, default=3, help="длительность прогона (реальное время)")
+    p.add_argument("--start-at", help="часы расписания стартуют с HH:MM[:SS] MSK; без — FORCE_MUSIC")
+    p.add_argument("--track-seconds", type=float, default=30, help="длина сгенерированных треков")
+    p.add_argument("--catalog-size", type=int, default=200, help="треков на тег в заглушке Jamendo")
+    p.add_argument("--outputs", default="", help="STREAM_OUTPUTS (mount:кодек:битрейт,...)")
+    p.add_argument("--jamendo-latency", type=float, default=0.05)
+    p.add_argument("--jamendo-fail", type=float, default=0.0)
+    p.add_argument("--groq-latency", type=float, default=0.5)
+    p.add_argument("--groq-fail", type=float, default=0.0)
+    p.add_argument("--tts-latency", type=float, default=0.8)
+    p.add_argument("--tts-fail", type=float, default=0.0)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--keep", action="store_true", help="не удалять временный каталог (кэш, сгенерированные файлы)")
+    p.add_argument("--json", help="записать отчёт в файл")
+    p.add_argument("--max-dead-air", type=float, help="порог мёртвого эфира, с")
+    p.add_argument("--max-ttfa", type=float, help="порог времени до первого звука, с")
+    p.add_argument("--max-gap-p95", type=float, help="порог p95 паузы между элементами, с")
+    p.add_argument("--max-cpu-per-hour", type=float, help="порог CPU-секунд на час аудио")
+    return p.parse_args()
+
+
+def main() -> int:
+    args = _parse_args()
+    random.seed(args.seed)
+    if not shutil.which(_ffmpeg()):
+        print("[BENCH] FFmpeg не найден (PATH или FFMPEG_PATH)")
+        return 2
+
+    work = Path(tempfile.mkdtemp(prefix="navo-bench-"))
+    media = work / "media"
+    for d in ("media", "cache", "jingles", "podcasts"):
+        (work / d).mkdir()
+    print(f"[BENCH] Генерация аудио в {work}")
+    tracks = [_tone(media / f"track{i}.mp3", args.track_seconds, 220 + 70 * i) for i in range(6)]
+    voices = [_tone(media / f"voice{i}.mp3", 2 + 2 * i, 660) for i in range(4)]
+    _tone(work / "jingles" / "jingle.mp3", 4, 1000)
+    for i in range(1, 5):
+        _tone(work / "podcasts" / f"{i}.mp3", 60, 330)
+
+    _FakeJamendo.files = tracks
+    _FakeJamendo.catalog_size = args.catalog_size
+    _FakeJamendo.track_seconds = args.track_seconds
+    _FakeJamendo.latency = args.jamendo_latency
+    _FakeJamendo.fail_rate = args.jamendo_fail
+    jamendo = ThreadingHTTPServer(("127.0.0.1", 0), _FakeJamendo)
+    threading.Thread(target=jamendo.serve_forever, name="bench-jamendo", daemon=True).start()
+
+    t0 = time.monotonic()
+    sink = _IcecastSink(t0)
+    threading.Thread(target=sink.serve_forever, name="bench-icecast", daemon=True).start()
+
+    # До импорта config: переменные окружения сильнее backend/.env
+    os.environ.update(
+        CACHE_DIR=str(work / "cache"),
+        JINGLES_DIR=str(work / "jingles"),
+        PODCASTS_DIR=str(work / "podcasts"),
+        JINGLE_FILE="jingle.mp3",
+        FORCE_MUSIC="0" if args.start_at else "1",
+        JAMENDO_API_URL=f"http://127.0.0.1:{jamendo.server_address[1]}/v3.0/tracks",
+        JAMENDO_CLIENT_ID="bench",
+        GROQ_API_KEY="bench",
+        TTS_PROVIDER="edge",
+        WEATHER_API_KEY="bench",
+        ICECAST_HOST="127.0.0.1",
+        ICECAST_PORT=str(sink.server_address[1]),
+        ICECAST_PASSWORD="bench",
+        STREAM_OUTPUTS=args.outputs,
+        STREAM_SERVER_ENABLED="0",
+        METADATA_HTTP_ENABLED="0",
+    )
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    if args.start_at:
+        _shift_clock(args.start_at)
+    _install_stubs(args, voices)
+    import main as radio
+
+    sampler = _ResourceSampler(sink)
+    threading.Thread(target=radio.main, name="bench-main", daemon=True).start()
+    time.sleep(args.minutes * 60)
+
+    cpu = sampler.stop()
+    wall = time.monotonic() - t0
+    with sink.lock:
+        for t in sink.timelines:
+            if t.closed_at is None:
+                t.close(t0)
+        report = _report(sink, cpu, sampler.peak_rss, wall)
+    _print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    failures = _check(report, args)
+    for f in failures:
+        print(f"[BENCH] ПРОВАЛ: {f}")
+    for pid in sampler.descendants():
+        try:
+            os.kill(pid, 9)
+        except OSError:
+            pass
+    if not args.keep:
+        shutil.rmtree(work, ignore_errors=True)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    # Пулы потоков эфира не завершаются сами — выходим, не дожидаясь их
+    code = main()
+    sys.stdout.flush()
+    os._exit(code)
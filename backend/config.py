@@ -13,9 +13,10 @@ load_dotenv(_env_path)
 
 # Корень проекта (Radio4)
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
-PODCASTS_DIR = PROJECT_ROOT / "podcasts"
-CACHE_DIR = PROJECT_ROOT / "cache"
-JINGLES_DIR = PROJECT_ROOT / "jingles"
+# Каталоги можно переопределить (бенчмарк, несколько экземпляров на одной машине)
+PODCASTS_DIR = Path(os.getenv("PODCASTS_DIR") or PROJECT_ROOT / "podcasts")
+CACHE_DIR = Path(os.getenv("CACHE_DIR") or PROJECT_ROOT / "cache")
+JINGLES_DIR = Path(os.getenv("JINGLES_DIR") or PROJECT_ROOT / "jingles")
 
 # Аудиозаставка (короткий mp3, раз в час)
 JINGLE_FILE = os.getenv("JINGLE_FILE", "jingle.mp3")
@@ -35,6 +36,7 @@ PODCAST_HOURS = (11, 16, 19, 22)
 PODCAST_FILES = ("1.mp3", "2.mp3", "3.mp3", "4.mp3")
 
 # API
+JAMENDO_API_URL = os.getenv("JAMENDO_API_URL", "https://api.jamendo.com/v3.0/tracks")
 JAMENDO_CLIENT_ID = os.getenv("JAMENDO_CLIENT_ID", "")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 TTS_PROVIDER = os.getenv("TTS_PROVIDER", "edge")
@@ -49,3 +51,86 @@ ICECAST_HOST = os.getenv("ICECAST_HOST", "localhost")
 ICECAST_PORT = int(os.getenv("ICECAST_PORT", "8000"))
 ICECAST_MOUNT = os.getenv("ICECAST_MOUNT", "stream")
 ICECAST_PASSWORD = os.getenv("ICECAST_PASSWORD", "")
+# Выходы эфира "mount:кодек:битрейт,..." (mp3 | opus | aac); пусто — ICECAST_MOUNT, MP3 128k
+STREAM_OUTPUTS = os.getenv("STREAM_OUTPUTS", "")
+# Буфер PCM каждого выхода, сек: темп энкодера при работе и запас, который проигрывается после
+# переподключения (более старое пропускается — эфир не отстаёт). Первый повтор — через ENCODER_RETRY_MS
+ENCODER_BUFFER_SECONDS = float(os.getenv("ENCODER_BUFFER_SECONDS", "3"))
+ENCODER_RETRY_MS = int(os.getenv("ENCODER_RETRY_MS", "250"))
+
+# Встроенный HTTP-сервер потока (без отдельного Icecast): http://HOST:PORT/<mount>
+STREAM_SERVER_ENABLED = os.getenv("STREAM_SERVER_ENABLED", "0").lower() in ("1", "true", "yes")
+STREAM_SERVER_HOST = os.getenv("STREAM_SERVER_HOST", "0.0.0.0")
+STREAM_SERVER_PORT = int(os.getenv("STREAM_SERVER_PORT", "8010"))
+# Кольцевой буфер на mount и сколько секунд отдавать новому слушателю сразу
+STREAM_SERVER_BUFFER_SECONDS = float(os.getenv("STREAM_SERVER_BUFFER_SECONDS", "30"))
+STREAM_SERVER_BURST_SECONDS = float(os.getenv("STREAM_SERVER_BURST_SECONDS", "3"))
+# «Сейчас в эфире» (/nowplaying.json, SSE /nowplaying/events) и метрики Prometheus (/metrics)
+# на том же порту — и при вещании через Icecast. По умолчанию выключено: открывает порт на STREAM_SERVER_HOST
+METADATA_HTTP_ENABLED = os.getenv("METADATA_HTTP_ENABLED", "0").lower() in ("1", "true", "yes")
+
+# Стример: пул декодеров (потоков) и сколько секунд начала каждого файла держать в памяти
+DECODER_WORKERS = int(os.getenv("DECODER_WORKERS", "2"))
+DECODE_BUFFER_SECONDS = float(os.getenv("DECODE_BUFFER_SECONDS", "5"))
+# Сколько feeder ждёт декодирования элемента очереди, прежде чем пропустить его
+DECODE_WAIT_TIMEOUT = float(os.getenv("DECODE_WAIT_TIMEOUT", "30"))
+# Сколько секунд аудио держать в очереди эфира впереди: следующий трек ставится, когда буфер ниже
+PLAYOUT_LOOKAHEAD_SECONDS = float(os.getenv("PLAYOUT_LOOKAHEAD_SECONDS", "20"))
+# Аварийный резерв: буфер ниже FILLER_WATERMARK_SECONDS и очередь пуста — feeder сам ставит
+# заставку или уже игравший трек из кэша (PCM готов заранее) вместо тишины
+FILLER_ENABLED = os.getenv("FILLER_ENABLED", "1").lower() in ("1", "true", "yes")
+FILLER_WATERMARK_SECONDS = float(os.getenv("FILLER_WATERMARK_SECONDS", "5"))
+# Сколько треков из кэша держать в резерве и через сколько минут элемент резерва может повториться
+FILLER_POOL_SIZE = int(os.getenv("FILLER_POOL_SIZE", "30"))
+FILLER_NO_REPEAT_MINUTES = float(os.getenv("FILLER_NO_REPEAT_MINUTES", "30"))
+
+# Подготовка наперёд: за сколько минут до якорного события готовить NEWS/WEATHER/PODCAST
+PRERENDER_MINUTES = float(os.getenv("PRERENDER_MINUTES", "5"))
+# Сколько ближайших событий расписания учитывать
+PLANNER_EVENTS = int(os.getenv("PLANNER_EVENTS", "3"))
+# Опрос RSS/погоды наперёд: за INGEST_LEAD_MINUTES до NEWS/WEATHER — раз в INGEST_POLL_MINUTES
+# (условный запрос; сценарий и TTS — только если содержимое изменилось)
+INGEST_LEAD_MINUTES = float(os.getenv("INGEST_LEAD_MINUTES", "30"))
+INGEST_POLL_MINUTES = float(os.getenv("INGEST_POLL_MINUTES", "10"))
+# Источник недоступен — сколько минут можно выпускать в эфир последние полученные данные
+INGEST_MAX_STALE_MINUTES = float(os.getenv("INGEST_MAX_STALE_MINUTES", "180"))
+
+# Микшер: кроссфейд между элементами и voice-over (трек приглушён под концом DJ-интро)
+MIXER_ENABLED = os.getenv("MIXER_ENABLED", "0").lower() in ("1", "true", "yes")
+CROSSFADE_SECONDS = float(os.getenv("CROSSFADE_SECONDS", "2"))
+VOICEOVER_SECONDS = float(os.getenv("VOICEOVER_SECONDS", "1.5"))
+DUCK_DB = float(os.getenv("DUCK_DB", "-12"))
+# Бюджет CPU на одно смешивание (мс); при регулярном превышении — простая склейка
+MIX_BUDGET_MS = float(os.getenv("MIX_BUDGET_MS", "20"))
+
+# Нормализация громкости: цель (LUFS), предел true peak (dBTP), максимальное усиление (dB)
+LOUDNESS_ENABLED = os.getenv("LOUDNESS_ENABLED", "1").lower() in ("1", "true", "yes")
+LOUDNESS_TARGET_LUFS = float(os.getenv("LOUDNESS_TARGET_LUFS", "-16"))
+LOUDNESS_TRUE_PEAK = float(os.getenv("LOUDNESS_TRUE_PEAK", "-1"))
+LOUDNESS_MAX_GAIN_DB = float(os.getenv("LOUDNESS_MAX_GAIN_DB", "12"))
+
+# Локальный каталог Jamendo: период фонового обновления (мин) и максимум треков на тег
+CATALOG_REFRESH_MINUTES = float(os.getenv("CATALOG_REFRESH_MINUTES", "360"))
+CATALOG_MAX_PER_TAG = int(os.getenv("CATALOG_MAX_PER_TAG", "1000"))
+
+# Конвейер подготовки треков: сколько держать готовыми/в работе, потоки стадий (интро, загрузка)
+PREP_DEPTH = int(os.getenv("PREP_DEPTH", "3"))
+PREP_WORKERS = int(os.getenv("PREP_WORKERS", "4"))
+
+# Кэш аудио (треки, интро, PCM): бюджет на диске, МБ. Сверх — вытесняются давно не игравшие
+CACHE_MAX_MB = int(os.getenv("CACHE_MAX_MB", "2048"))
+
+# Загрузки: параллельно, попыток с докачкой, лимит полосы на все загрузки (КБ/с, 0 — без лимита)
+DOWNLOAD_CONCURRENCY = int(os.getenv("DOWNLOAD_CONCURRENCY", "2"))
+DOWNLOAD_RETRIES = int(os.getenv("DOWNLOAD_RETRIES", "3"))
+DOWNLOAD_MAX_KBPS = float(os.getenv("DOWNLOAD_MAX_KBPS", "0"))
+
+# TTS: сколько фраз синтезировать одновременно
+TTS_CONCURRENCY = int(os.getenv("TTS_CONCURRENCY", "4"))
+# Потоковый TTS: сколько мс звука накопить перед выходом в эфир (джиттер-буфер)
+TTS_JITTER_MS = int(os.getenv("TTS_JITTER_MS", "400"))
+# Сколько секунд ждать синтез фразы: дольше — фраза пропускается (трек уходит без интро)
+TTS_TIMEOUT = float(os.getenv("TTS_TIMEOUT", "60"))
+
+# Groq: DJ-интро для скольких треков вперёд запрашивать одним запросом
+GROQ_INTRO_BATCH = int(os.getenv("GROQ_INTRO_BATCH", "4"))
@@ -1,17 +1,81 @@
 """
 NAVO RADIO — точка входа.
 Планировщик проверяет время Москвы и определяет, что играть.
+Главный поток спит до события: граница часа (таймер) или «буфер эфира почти пуст» (сигнал feeder'а).
+Холодный старт: энкодер и готовая стартовая заставка — первыми, подготовка треков — в фоне.
 """
 import time
 
-from config import FORCE_MUSIC, JINGLES_DIR, JINGLE_FILE, PROJECT_ROOT
-from scheduler import BlockType, get_current_block, get_moscow_now, mark_anchor_played, mark_jingle_played
+# Отсчёт холодного старта — до импорта сервисов
+_LAUNCHED = time.perf_counter()
+
+from config import FORCE_MUSIC, JINGLES_DIR, JINGLE_FILE, PLAYOUT_LOOKAHEAD_SECONDS, PROJECT_ROOT
+from planner import start_planner, take_prerendered
+from scheduler import (
+    BlockType,
+    get_current_block,
+    get_moscow_now,
+    mark_anchor_played,
+    mark_jingle_played,
+    seconds_until_next_hour,
+)
+from services.cache_manager import cleanup_partial, enforce_budget
 from services.jingle_block import run_jingle_block
-from services.music_block import _ensure_silence_file, run_music_track
+from services.music_block import on_track_ready, run_music_track, start_prep
 from services.news_block import run_news_block
 from services.podcast_block import run_podcast_block
-from services.streamer import enqueue_track, start_continuous_stream
+from services.streamer import (
+    enqueue_silence,
+    enqueue_track,
+    get_playout_status,
+    mark_launch,
+    on_buffer_below,
+    start_continuous_stream,
+    startup_ident_played,
+)
 from services.weather_block import run_weather_block
+from timers import TimerHeap
+
+# События главного цикла
+_WAKE = "wake"  # пересмотреть расписание сейчас
+_HOUR = "hour"  # граница часа: заставка / якорное событие
+_LOW_WATER = "low_water"  # в буфере эфира меньше PLAYOUT_LOOKAHEAD_SECONDS
+_RETRY = "retry"  # повтор после неудачи
+
+_MUSIC_RETRY_SECONDS = 30
+# Проснуться чуть позже границы — часы уже показывают :00
+_BOUNDARY_MARGIN = 0.05
+
+_timers = TimerHeap()
+
+
+def _schedule_next_hour() -> None:
+    _timers.call_later(seconds_until_next_hour() + _BOUNDARY_MARGIN, _HOUR)
+
+
+def _retry_later() -> None:
+    _timers.cancel(_RETRY)
+    _timers.call_later(_MUSIC_RETRY_SECONDS, _RETRY)
+
+
+def _music_step() -> None:
+    """
+    Следующий трек ставим, когда в эфире осталось меньше PLAYOUT_LOOKAHEAD_SECONDS,
+    поэтому расписание проверяется по времени эфира, а не на 16 треков вперёд.
+    Дальше — спать до сигнала feeder'а.
+    """
+    st = get_playout_status()
+    if st.pending_items == 0 and st.buffered_seconds < PLAYOUT_LOOKAHEAD_SECONDS:
+        if not run_music_track(intro_enabled=True):
+            # Готового трека нет — не ждём его здесь (граница часа не должна опаздывать):
+            # конвейер разбудит, когда трек будет готов; повтор — на случай, если подготовка не удаётся
+            print("[MUSIC] Готового трека нет, ждём подготовку")
+            on_track_ready(lambda: _timers.notify(_WAKE))
+            _retry_later()
+            return
+    if not on_buffer_below(PLAYOUT_LOOKAHEAD_SECONDS, lambda: _timers.notify(_LOW_WATER)):
+        # Feeder не запущен — сигнала не будет, проверим позже
+        _retry_later()
 
 
 def run_block(block_type: BlockType, arg: str | None) -> None:
@@ -20,62 +84,82 @@ def run_block(block_type: BlockType, arg: str | None) -> None:
         run_jingle_block()
         mark_jingle_played()  # всегда, чтобы не зациклиться при отсутствии файла
     elif block_type == BlockType.NEWS:
-        run_news_block()
+        # Выпуск подготовлен планировщиком заранее — в эфир сразу, без генерации
+        run_news_block(take_prerendered(BlockType.NEWS))
         mark_anchor_played()  # до конца часа — MUSIC
     elif block_type == BlockType.WEATHER:
-        run_weather_block()
+        run_weather_block(take_prerendered(BlockType.WEATHER))
         mark_anchor_played()
     elif block_type == BlockType.PODCAST:
-        run_podcast_block(arg or "")
+        # Подкаст декодирован планировщиком заранее — старт без ожидания FFmpeg
+        run_podcast_block(arg or "", take_prerendered(BlockType.PODCAST))
         mark_anchor_played()
     elif block_type == BlockType.MUSIC:
-        # Цикл треков — проверяем расписание перед каждым треком
-        while get_current_block()[0] == BlockType.MUSIC:
-            if not run_music_track(intro_enabled=True):
-                print("[MUSIC] Не удалось загрузить трек, пауза 30 сек")
-                time.sleep(30)
+        _music_step()
 
 
-def _warmup_stream(block_type: BlockType) -> None:
-    """Быстрый старт: сразу подключаем источник. Для NEWS/WEATHER — 2–3 тишины, т.к. генерация 15–30 сек."""
+# Пауза между заставкой и якорем, пока он синтезируется: дольше — уже резервная музыка
+_ANCHOR_GAP_MS = 8000
+
+
+def _warmup_stream(block_type: BlockType, startup: bool = False) -> None:
+    """
+    Быстрый старт: сразу подключаем источник и ставим заставку.
+    NEWS/WEATHER: после заставки — пауза _ANCHOR_GAP_MS на время генерации; готовый якорь её прерывает,
+    а если генерация дольше — feeder сам добивает тишиной или резервным треком.
+    startup — первый блок после запуска: заставка уже звучит, если feeder получил её готовый PCM.
+    """
     # JINGLE и PODCAST — мгновенно, warmup не нужен
     if block_type in (BlockType.JINGLE, BlockType.PODCAST):
         return
     if not start_continuous_stream():
         return
-    silence = _ensure_silence_file()
+    if startup and startup_ident_played():
+        return
     jingle = JINGLES_DIR / JINGLE_FILE
     if jingle.exists():
-        enqueue_track(None, jingle)
-    # NEWS/WEATHER: генерация долгая — подкладываем 2 тишины (16 сек) на время fetch+Groq+TTS
-    if block_type in (BlockType.NEWS, BlockType.WEATHER) and silence.exists():
-        for _ in range(2):
-            enqueue_track(None, silence, block=False)
-    elif silence.exists():
-        enqueue_track(None, silence)
+        enqueue_track(None, jingle, title="NAVO RADIO", priority=True)
+    if block_type in (BlockType.NEWS, BlockType.WEATHER):
+        enqueue_silence(_ANCHOR_GAP_MS, priority=True)
 
 
 def main() -> None:
+    mark_launch(_LAUNCHED)
     print("NAVO RADIO — Backend")
     print(f"Проект: {PROJECT_ROOT}")
+    print(f"[STARTUP] Импорт модулей: {(time.perf_counter() - _LAUNCHED) * 1000:.0f} мс")
+    # Недописанные файлы прошлого запуска не должны попасть в эфир
+    cleanup_partial()
+    # Сначала звук: энкодер и готовая заставка, затем всё остальное — пока она играет
+    start_continuous_stream(startup_ident=True)
+    start_prep()
     if FORCE_MUSIC:
         print("Режим: FORCE_MUSIC (всегда музыка)")
     else:
         print("Режим: расписание (врезки включены)")
+        start_planner()
     print("---")
+    enforce_budget()
 
+    if not FORCE_MUSIC:
+        # Заставка/якорь встают в очередь точно на границе часа
+        _schedule_next_hour()
+    _timers.notify(_WAKE)
+    last_block: BlockType | None = None
     while True:
-        now = get_moscow_now()
+        event = _timers.wait()
+        if event == _HOUR:
+            _schedule_next_hour()
         block_type, arg = get_current_block()
-        print(f"[{now.strftime('%H:%M:%S')} MSK] {block_type.value}" + (f" ({arg})" if arg else ""))
-        _warmup_stream(block_type)
+        if block_type != last_block or block_type != BlockType.MUSIC:
+            now = get_moscow_now()
+            print(f"[{now.strftime('%H:%M:%S')} MSK] {block_type.value}" + (f" ({arg})" if arg else ""))
+            _warmup_stream(block_type, startup=last_block is None)
+        last_block = block_type
         run_block(block_type, arg)
         if block_type != BlockType.MUSIC:
-            # Подложить тишину, чтобы эфир не молчал во время паузы до следующей проверки
-            silence = _ensure_silence_file()
-            if silence.exists():
-                enqueue_track(None, silence, block=False)
-            time.sleep(5)
+            # После заставки — якорь или музыка: пересмотреть расписание сразу
+            _timers.notify(_WAKE)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,136 @@
+"""
+NAVO RADIO — подготовка эфира наперёд.
+За PRERENDER_MINUTES до якорного события готовит NEWS/WEATHER (fetch + Groq + TTS)
+и декодирует подкаст — к границе часа аудио уже готово к постановке в очередь.
+Раньше, с INGEST_LEAD_MINUTES, источники NEWS/WEATHER опрашиваются раз в INGEST_POLL_MINUTES —
+только условный запрос, без Groq и TTS: к подготовке данные уже на руках, и сеть ей обычно не нужна.
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from config import INGEST_LEAD_MINUTES, INGEST_POLL_MINUTES, PLANNER_EVENTS, PODCASTS_DIR, PRERENDER_MINUTES
+from scheduler import BlockType, ScheduledEvent, get_moscow_now, get_upcoming_events
+from services import news_block, weather_block
+from services.news_block import render_news_block
+from services.pcm_cache import ensure_pcm
+from services.weather_block import render_weather_block
+
+# Как часто пересчитывать ближайшие события
+_POLL_SECONDS = 30
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="planner")
+_renders: dict[ScheduledEvent, Future] = {}
+# Опрос источников наперёд: когда начат последний (time.monotonic) и идущий сейчас
+_polled: dict[BlockType, float] = {}
+_polls: dict[BlockType, Future] = {}
+_lock = threading.Lock()
+_thread: threading.Thread | None = None
+
+
+def _render_podcast(filename: str) -> Path | None:
+    """Подкаст уже на диске — заранее декодируем в PCM, чтобы старт был мгновенным."""
+    path = PODCASTS_DIR / filename
+    if not path.exists():
+        return None
+    ensure_pcm(path)
+    return path
+
+
+def _render(event: ScheduledEvent) -> Path | None:
+    print(f"[PLANNER] Подготовка {event.block_type.value} к {event.at.strftime('%H:%M')}")
+    if event.block_type == BlockType.NEWS:
+        return render_news_block()
+    if event.block_type == BlockType.WEATHER:
+        return render_weather_block()
+    if event.block_type == BlockType.PODCAST:
+        return _render_podcast(event.arg or "")
+    return None
+
+
+def _poll(block_type: BlockType) -> None:
+    """Обновить данные источника. Сценарий и аудио — один раз, в _render."""
+    if block_type == BlockType.NEWS:
+        news_block.fetch_news_text()
+    elif block_type == BlockType.WEATHER:
+        weather_block.fetch_weather_data()
+
+
+def _maybe_poll(event: ScheduledEvent, now: datetime) -> None:
+    if event.block_type not in (BlockType.NEWS, BlockType.WEATHER):
+        return
+    if event.at > now + timedelta(minutes=INGEST_LEAD_MINUTES):
+        return
+    running = _polls.get(event.block_type)
+    if running and not running.done():
+        return
+    last = _polled.get(event.block_type)
+    if last is not None and time.monotonic() - last < INGEST_POLL_MINUTES * 60:
+        return
+    _polled[event.block_type] = time.monotonic()
+    _polls[event.block_type] = _executor.submit(_poll, event.block_type)
+
+
+def plan_once(now: datetime | None = None) -> None:
+    """
+    Запустить подготовку событий, до которых осталось меньше PRERENDER_MINUTES,
+    и опрос источников событий в пределах INGEST_LEAD_MINUTES.
+    """
+    now = now or get_moscow_now()
+    horizon = now + timedelta(minutes=PRERENDER_MINUTES)
+    with _lock:
+        for event in get_upcoming_events(PLANNER_EVENTS, now):
+            if event.at <= horizon and event not in _renders:
+                _renders[event] = _executor.submit(_render, event)
+            elif event not in _renders:
+                _maybe_poll(event, now)
+        # Старые события (прошлые часы) больше не нужны
+        for event in [e for e in _renders if e.at < now - timedelta(hours=1)]:
+            del _renders[event]
+
+
+def _find(block_type: BlockType, now: datetime) -> tuple[ScheduledEvent, Future] | None:
+    start = now.replace(minute=0, second=0, microsecond=0)
+    for event, future in _renders.items():
+        if event.block_type == block_type and event.at == start:
+            return event, future
+    return None
+
+
+def take_prerendered(block_type: BlockType, timeout: float = 60) -> Path | None:
+    """
+    Забрать подготовленное аудио для события текущего часа.
+    Если подготовка ещё идёт — дождаться её (не более timeout), а не начинать заново.
+    None — заранее ничего не готовили, блок сгенерирует аудио сам.
+    """
+    with _lock:
+        found = _find(block_type, get_moscow_now())
+        if found:
+            del _renders[found[0]]
+    if not found:
+        return None
+    try:
+        return found[1].result(timeout=timeout)
+    except Exception as e:
+        print(f"[PLANNER] Подготовка {block_type.value} не удалась: {e}")
+        return None
+
+
+def _run() -> None:
+    while True:
+        try:
+            plan_once()
+        except Exception as e:
+            print(f"[PLANNER] Ошибка: {e}")
+        time.sleep(_POLL_SECONDS)
+
+
+def start_planner() -> None:
+    """Запустить фоновый планировщик (один раз)."""
+    global _thread
+    if _thread and _thread.is_alive():
+        return
+    _thread = threading.Thread(target=_run, name="planner", daemon=True)
+    _thread.start()
@@ -2,10 +2,10 @@
 NAVO RADIO — планировщик.
 Определяет, что играть в текущий момент по московскому времени.
 """
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from enum import Enum
-
-import pytz
+from zoneinfo import ZoneInfo
 
 from config import (
     FORCE_MUSIC,
@@ -26,10 +26,22 @@ class BlockType(str, Enum):
     MUSIC = "music"
 
 
+@dataclass(frozen=True)
+class ScheduledEvent:
+    """Якорное событие расписания (NEWS/WEATHER/PODCAST) в начале часа."""
+    at: datetime
+    block_type: BlockType
+    arg: str | None = None
+
+
+# Часовой пояс разрешается один раз при импорте, а не при каждом вызове.
+# zoneinfo из стандартной библиотеки: без импорта pytz при холодном старте (Windows — пакет tzdata)
+_TZ = ZoneInfo(TIMEZONE)
+
+
 def get_moscow_now() -> datetime:
     """Текущее время по Москве."""
-    tz = pytz.timezone(TIMEZONE)
-    return datetime.now(tz)
+    return datetime.now(_TZ)
 
 
 _jingle_played_hour: int | None = None
@@ -75,6 +87,15 @@ def get_current_block() -> tuple[BlockType, str | None]:
     if _anchor_played_hour == hour:
         return BlockType.MUSIC, None
 
+    anchor = _anchor_for_hour(hour)
+    if anchor:
+        return anchor
+
+    return BlockType.MUSIC, None
+
+
+def _anchor_for_hour(hour: int) -> tuple[BlockType, str | None] | None:
+    """Якорное событие часа по расписанию или None."""
     if hour in NEWS_HOURS:
         return BlockType.NEWS, None
 
@@ -86,4 +107,34 @@ def get_current_block() -> tuple[BlockType, str | None]:
         filename = PODCAST_FILES[idx]
         return BlockType.PODCAST, filename
 
-    return BlockType.MUSIC, None
+    return None
+
+
+def get_upcoming_events(count: int = 3, now: datetime | None = None) -> list[ScheduledEvent]:
+    """
+    Ближайшие count якорных событий.
+    Событие текущего часа включается, если ещё не сыграно.
+    """
+    if FORCE_MUSIC:
+        return []
+    now = now or get_moscow_now()
+    start = now.replace(minute=0, second=0, microsecond=0)
+    events: list[ScheduledEvent] = []
+    # Двое суток вперёд — заведомо больше, чем нужно для любого расписания
+    for i in range(48):
+        at = start + timedelta(hours=i)
+        if i == 0 and _anchor_played_hour == at.hour:
+            continue
+        anchor = _anchor_for_hour(at.hour)
+        if anchor:
+            events.append(ScheduledEvent(at, anchor[0], anchor[1]))
+            if len(events) >= count:
+                break
+    return events
+
+
+def seconds_until_next_hour(now: datetime | None = None) -> float:
+    """Секунд до следующей границы часа (заставка / якорное событие)."""
+    now = now or get_moscow_now()
+    nxt = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    return (nxt - now).total_seconds()
@@ -0,0 +1,142 @@
+"""
+NAVO RADIO — менеджер кэша.
+Бюджет CACHE_MAX_MB на аудио в CACHE_DIR, вытеснение давно не использованных (LRU по atime).
+Файлы в очереди эфира и готовые к эфиру закреплены (pin) и не вытесняются.
+Запись — во временный файл и атомарный rename: обрезанный файл никогда не попадёт в эфир.
+"""
+import os
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from config import CACHE_DIR, CACHE_MAX_MB
+
+# Управляемые файлы: исходное аудио, производный PCM и недокачанные .part.
+# Индексы (json, sqlite) не трогаем
+_MANAGED_SUFFIXES = (".mp3", ".pcm", ".part")
+
+_pins: dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def _group(path: Path) -> str:
+    """Группа файла: track_1.mp3 и track_1.<ключ>.pcm — одна группа track_1."""
+    return path.name.split(".", 1)[0]
+
+
+def pin(*paths: Path | None) -> None:
+    """Закрепить файлы (и их PCM) — не вытеснять, пока не будет unpin."""
+    with _lock:
+        for p in paths:
+            if p is not None:
+                g = _group(p)
+                _pins[g] = _pins.get(g, 0) + 1
+
+
+def unpin(*paths: Path | None) -> None:
+    with _lock:
+        for p in paths:
+            if p is not None:
+                g = _group(p)
+                n = _pins.get(g, 0) - 1
+                if n > 0:
+                    _pins[g] = n
+                else:
+                    _pins.pop(g, None)
+
+
+def is_pinned(path: Path) -> bool:
+    """Файл закреплён: ждёт эфира в очереди или в конвейере подготовки."""
+    with _lock:
+        return _group(path) in _pins
+
+
+def touch(path: Path) -> None:
+    """Отметить использование файла: atime = сейчас (mtime не меняем — на нём ключ PCM-кэша)."""
+    try:
+        st = path.stat()
+        os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+    except OSError:
+        pass
+
+
+@contextmanager
+def atomic_write(path: Path) -> Iterator[Path]:
+    """
+    Писать во временный файл рядом с path, по успеху — атомарно переименовать.
+    При ошибке временный файл удаляется, path не появляется.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = temp_path(path)
+    try:
+        yield tmp
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    commit_file(tmp, path)
+
+
+def temp_path(path: Path) -> Path:
+    """Уникальное имя временного файла рядом с path (недописанные удаляет cleanup_partial)."""
+    return path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+
+
+def commit_file(tmp: Path, path: Path) -> None:
+    """Атомарно поставить готовый файл на место и учесть его в бюджете кэша."""
+    os.replace(tmp, path)
+    touch(path)
+    enforce_budget()
+
+
+def _scan() -> list[tuple[float, int, Path]]:
+    entries = []
+    try:
+        with os.scandir(CACHE_DIR) as it:
+            for e in it:
+                if e.is_file() and e.name.endswith(_MANAGED_SUFFIXES):
+                    st = e.stat()
+                    entries.append((st.st_atime, st.st_size, Path(e.path)))
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def enforce_budget() -> int:
+    """Вытеснять давно не использованные группы файлов, пока кэш больше бюджета. Возвращает освобождённые байты."""
+    budget = CACHE_MAX_MB * 1024 * 1024
+    with _lock:
+        entries = _scan()
+        total = sum(size for _, size, _ in entries)
+        if total <= budget:
+            return 0
+        # Группа вытесняется целиком (mp3 + PCM); время группы — самое позднее использование
+        groups: dict[str, list[tuple[float, int, Path]]] = {}
+        for entry in entries:
+            groups.setdefault(_group(entry[2]), []).append(entry)
+        order = sorted(groups.items(), key=lambda kv: max(a for a, _, _ in kv[1]))
+        freed = 0
+        for name, files in order:
+            if total - freed <= budget:
+                break
+            if name in _pins:
+                continue
+            for _, size, p in files:
+                try:
+                    p.unlink()
+                    freed += size
+                except OSError:
+                    pass
+    if freed:
+        print(f"[CACHE] Вытеснено {freed / (1024 * 1024):.1f} МБ")
+    return freed
+
+
+def cleanup_partial() -> None:
+    """Удалить недописанные временные файлы прошлых запусков."""
+    for p in CACHE_DIR.glob(".*.tmp"):
+        p.unlink(missing_ok=True)
+    for p in CACHE_DIR.glob("*.tmp"):
+        p.unlink(missing_ok=True)
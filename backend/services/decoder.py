@@ -0,0 +1,301 @@
+"""
+NAVO RADIO — пул декодеров.
+Долгоживущие потоки заранее декодируют элементы очереди эфира в PCM.
+Feeder только копирует готовые байты в энкодер — медленный или битый файл не останавливает эфир.
+"""
+import queue
+import subprocess
+import threading
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import DECODE_BUFFER_SECONDS, DECODER_WORKERS, TTS_JITTER_MS
+
+from .cache_manager import pin, touch, unpin
+from .loudness import analyze_async, apply_gain, gain_for
+from .pcm_cache import BYTES_PER_SECOND, CHUNK_SIZE, decode_cmd, ensure_pcm, iter_decode, iter_pcm
+
+# Начало каждого файла держим в памяти — feeder стартует без ожидания диска
+HEAD_BYTES = int(DECODE_BUFFER_SECONDS * BYTES_PER_SECOND) // 2 * 2
+# Живой элемент: сколько PCM накопить до выхода в эфир и чем закрывать провал в потоке
+JITTER_BYTES = int(TTS_JITTER_MS / 1000 * BYTES_PER_SECOND) // 2 * 2
+_GAP_POLL = 0.05
+_GAP_SILENCE = bytes(int(_GAP_POLL * BYTES_PER_SECOND) // 2 * 2)
+
+
+@dataclass
+class DecodedFile:
+    """Декодированный файл: голова в памяти + остаток из кэша PCM."""
+    path: Path
+    head: bytes
+    rest: Iterator[bytes]
+    size: int | None = None  # байт PCM; None — декодируется на лету, длина неизвестна
+
+    def chunks(self) -> Iterator[bytes]:
+        view = memoryview(self.head)
+        for offset in range(0, len(view), CHUNK_SIZE):
+            yield view[offset:offset + CHUNK_SIZE]
+        yield from self.rest
+
+    def close(self) -> None:
+        close = getattr(self.rest, "close", None)
+        if close:
+            close()
+
+
+class DecodeJob:
+    """Элемент очереди эфира: intro (опционально) + основной файл."""
+
+    def __init__(self, intro_path: Path | None, track_path: Path, title: str | None = None):
+        self.intro_path = intro_path
+        self.track_path = track_path
+        # Что показывать слушателям, пока элемент в эфире
+        self.title = title or track_path.stem
+        self.files: list[DecodedFile] = []
+        self.cancelled = False
+        self._ready = threading.Event()
+        # Feeder доиграл (или пропустил) элемент
+        self.played = threading.Event()
+        # Пока элемент в очереди или в эфире — файлы не вытесняются из кэша
+        pin(intro_path, track_path)
+
+    @property
+    def name(self) -> str:
+        return self.track_path.name
+
+    @property
+    def decoded(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def size(self) -> int:
+        """Известный объём PCM в байтах (0 — ещё не декодирован)."""
+        return sum(f.size or len(f.head) for f in self.files)
+
+    @property
+    def duration(self) -> float:
+        return self.size / BYTES_PER_SECOND
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Дождаться окончания декодирования. False — не успели."""
+        return self._ready.wait(timeout)
+
+    def cancel(self) -> None:
+        """Отказаться от элемента (не дождались) — освободить ресурсы."""
+        self.cancelled = True
+        if self._ready.is_set():
+            self.close()
+
+    def close(self) -> None:
+        for f in self.files:
+            f.close()
+        self.files = []
+
+    def finish(self) -> None:
+        """Элемент доигран или отброшен: снять закрепление в кэше, разбудить ожидающих."""
+        if not self.played.is_set():
+            unpin(self.intro_path, self.track_path)
+            self.played.set()
+
+    def parts(self) -> Iterator[tuple[str, Iterator[bytes]]]:
+        """Части элемента по порядку: ("intro" | "track", куски PCM с нормализацией громкости)."""
+        for f in self.files:
+            role = "intro" if f.path == self.intro_path else "track"
+            yield role, apply_gain(_safe_chunks(f), gain_for(f.path))
+
+    def chunks(self) -> Iterator[bytes]:
+        """PCM всех файлов подряд."""
+        for _, chunks in self.parts():
+            yield from chunks
+
+    def decode(self) -> None:
+        try:
+            if not self.track_path.exists():
+                print(f"[DECODER] Файл не найден, пропуск: {self.track_path}")
+                return
+            paths = [self.track_path]
+            if self.intro_path and self.intro_path.exists():
+                paths.insert(0, self.intro_path)
+            for p in paths:
+                decoded = _decode_file(p)
+                if decoded:
+                    self.files.append(decoded)
+        finally:
+            self._ready.set()
+            if self.cancelled:
+                self.close()
+
+
+def _safe_chunks(f: DecodedFile) -> Iterator[bytes]:
+    """Ошибка чтения файла — пропуск его остатка, не всего элемента."""
+    it = f.chunks()
+    while True:
+        try:
+            chunk = next(it)
+        except StopIteration:
+            return
+        except Exception as e:
+            print(f"[DECODER] Ошибка чтения {f.path}: {e}")
+            return
+        yield chunk
+
+
+def _decode_file(path: Path) -> DecodedFile | None:
+    """Декодировать файл (один раз — через кэш PCM) и прочитать голову в память."""
+    try:
+        touch(path)
+        pcm = ensure_pcm(path)
+        # Громкость меряется один раз в фоне — к эфиру коэффициент обычно готов
+        analyze_async(path)
+        source = iter_pcm(pcm) if pcm else iter_decode(path)
+        total = pcm.stat().st_size if pcm else None
+        parts: list[bytes] = []
+        size = 0
+        while size < HEAD_BYTES:
+            chunk = next(source, None)
+            if chunk is None:
+                total = size
+                break
+            parts.append(chunk)
+            size += len(chunk)
+        if not size:
+            print(f"[DECODER] Пустой результат декодирования: {path}")
+            return None
+        return DecodedFile(path=path, head=b"".join(parts), rest=source, size=total)
+    except Exception as e:
+        print(f"[DECODER] Ошибка {path}: {e}")
+        return None
+
+
+class LiveDecodeItem:
+    """
+    Элемент очереди эфира, аудио которого ещё синтезируется: MP3 поступает кусками (write),
+    FFmpeg декодирует его на лету. Готов к эфиру, как только накоплен джиттер-буфер.
+    """
+
+    def __init__(self, name: str = "live", title: str | None = None):
+        self.name = name
+        self.title = title or name
+        self.cancelled = False
+        self.played = threading.Event()
+        self._ready = threading.Event()
+        self._pcm: queue.Queue[bytes | None] = queue.Queue()
+        self._received = 0
+        self._proc = subprocess.Popen(
+            decode_cmd("pipe:0"),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        threading.Thread(target=self._pump, name="live-decode", daemon=True).start()
+
+    @property
+    def decoded(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def duration(self) -> float:
+        """Сколько звука уже получено (итог известен только после end_input)."""
+        return self._received / BYTES_PER_SECOND
+
+    def write(self, data: bytes) -> None:
+        """Очередной кусок MP3 от синтеза."""
+        if self.cancelled:
+            return
+        try:
+            assert self._proc.stdin is not None
+            self._proc.stdin.write(data)
+            self._proc.stdin.flush()
+        except (BrokenPipeError, OSError):
+            pass
+
+    def end_input(self) -> None:
+        """Синтез закончен: FFmpeg дочитает остаток и завершится."""
+        try:
+            assert self._proc.stdin is not None
+            self._proc.stdin.close()
+        except OSError:
+            pass
+
+    def _pump(self) -> None:
+        assert self._proc.stdout is not None
+        try:
+            while chunk := self._proc.stdout.read1(CHUNK_SIZE):
+                self._pcm.put(chunk)
+                self._received += len(chunk)
+                if self._received >= JITTER_BYTES:
+                    self._ready.set()
+        finally:
+            self._pcm.put(None)
+            self._ready.set()
+            self._proc.wait()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Дождаться джиттер-буфера (или конца короткой фразы)."""
+        return self._ready.wait(timeout)
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        self._proc.kill()
+
+    def close(self) -> None:
+        if self._proc.poll() is None:
+            self._proc.kill()
+
+    def finish(self) -> None:
+        self.played.set()
+
+    def chunks(self) -> Iterator[bytes]:
+        """PCM по мере декодирования; синтез отстал — короткая тишина вместо обрыва эфира."""
+        while True:
+            try:
+                chunk = self._pcm.get(timeout=_GAP_POLL)
+            except queue.Empty:
+                yield _GAP_SILENCE
+                continue
+            if chunk is None:
+                return
+            yield chunk
+
+    def parts(self) -> Iterator[tuple[str, Iterator[bytes]]]:
+        # Как выпуск из файла: для микшера — самостоятельная часть, не интро к треку
+        yield "track", self.chunks()
+
+
+class DecoderPool:
+    """Фиксированный пул потоков-декодеров, задания — в порядке очереди эфира."""
+
+    def __init__(self, workers: int = DECODER_WORKERS):
+        self._jobs: queue.Queue[DecodeJob] = queue.Queue()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"decoder-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, job: DecodeJob) -> DecodeJob:
+        self._jobs.put(job)
+        return job
+
+    def _run(self) -> None:
+        while True:
+            job = self._jobs.get()
+            if job.cancelled:
+                job._ready.set()
+                continue
+            job.decode()
+
+
+_pool: DecoderPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> DecoderPool:
+    """Общий пул декодеров (создаётся при первом обращении)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DecoderPool()
+        return _pool
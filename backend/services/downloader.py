@@ -0,0 +1,148 @@
+"""
+NAVO RADIO — загрузки по HTTP.
+Общая Session с пулом keep-alive соединений, докачка через Range, проверка по Content-Length
+и пробным декодированием. Параллельные загрузки с общим ограничением полосы —
+предзагрузка не забивает канал, по которому идёт стрим в Icecast.
+"""
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from config import DOWNLOAD_CONCURRENCY, DOWNLOAD_MAX_KBPS, DOWNLOAD_RETRIES
+
+from .cache_manager import commit_file
+from .metrics import STAGE_SECONDS
+from .pcm_cache import ffmpeg_exe
+
+if TYPE_CHECKING:
+    import requests
+
+CHUNK_SIZE = 65536
+_TIMEOUT = (10, 60)  # connect, read
+_PROBE_TIMEOUT = 30
+
+_session: "requests.Session | None" = None
+_session_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(1, DOWNLOAD_CONCURRENCY))
+
+
+class DownloadError(RuntimeError):
+    """Файл не скачан целиком или не декодируется."""
+
+
+def get_session() -> "requests.Session":
+    """
+    Общая Session: соединения переиспользуются между запросами (без повторного TCP+TLS).
+    requests импортируется при первом запросе — не задерживает старт эфира.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max(8, DOWNLOAD_CONCURRENCY * 2))
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+        return _session
+
+
+class _RateLimiter:
+    """Общий лимит полосы для всех загрузок (байт/с; 0 — без лимита)."""
+
+    # Допустимый «запас» опережения, сек — без него мелкие куски ждали бы на каждом шаге
+    _BURST = 0.5
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def consume(self, n: int) -> None:
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._next = max(self._next, now) + n / self.rate
+            delay = self._next - now - self._BURST
+        if delay > 0:
+            time.sleep(delay)
+
+
+_limiter = _RateLimiter(DOWNLOAD_MAX_KBPS * 1024)
+
+
+def _total_size(resp: "requests.Response", offset: int) -> int | None:
+    """Полный размер файла из Content-Range (206) или Content-Length (200)."""
+    if resp.status_code == 206:
+        total = resp.headers.get("Content-Range", "").rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    length = resp.headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else None
+
+
+def _fetch(url: str, part: Path) -> None:
+    """Одна попытка: докачать part с текущего размера."""
+    offset = part.stat().st_size if part.exists() else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    with get_session().get(url, headers=headers, timeout=_TIMEOUT, stream=True) as resp:
+        if resp.status_code == 416:
+            # Частичный файл не совпадает с сервером — начать заново
+            part.unlink(missing_ok=True)
+            raise DownloadError("Range не принят сервером")
+        resp.raise_for_status()
+        if resp.status_code == 200:
+            offset = 0  # сервер не поддерживает Range — качаем целиком
+        total = _total_size(resp, offset)
+        with open(part, "ab" if offset else "wb") as f:
+            for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                _limiter.consume(len(chunk))
+                f.write(chunk)
+    size = part.stat().st_size
+    if total is not None and size != total:
+        raise DownloadError(f"получено {size} из {total} байт")
+
+
+def _probe(path: Path) -> bool:
+    """Пробное декодирование начала файла: это аудио, а не обрезок или HTML-страница ошибки."""
+    try:
+        result = subprocess.run(
+            [ffmpeg_exe(), "-v", "error", "-i", str(path), "-t", "5", "-f", "null", "-"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=_PROBE_TIMEOUT,
+        )
+        return result.returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
+def download(url: str, path: Path) -> Path:
+    """
+    Скачать url в path: докачка после обрыва, проверка размера и декодирования.
+    Недокачанное лежит в path.part до следующей попытки; path появляется только проверенным.
+    """
+    import requests
+
+    part = path.with_name(path.name + ".part")
+    last_error: Exception | None = None
+    with _slots, STAGE_SECONDS.time(stage="download"):
+        for attempt in range(DOWNLOAD_RETRIES):
+            try:
+                _fetch(url, part)
+                if not _probe(part):
+                    part.unlink(missing_ok=True)
+                    raise DownloadError("файл не декодируется")
+                commit_file(part, path)
+                return path
+            except (requests.RequestException, DownloadError, OSError) as e:
+                last_error = e
+                print(f"[DOWNLOAD] {path.name}: попытка {attempt + 1} не удалась: {e}")
+                if attempt + 1 < DOWNLOAD_RETRIES:
+                    time.sleep(min(2 ** attempt, 10))
+    raise DownloadError(f"{path.name}: {last_error}")
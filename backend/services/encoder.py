@@ -0,0 +1,349 @@
+"""
+NAVO RADIO — энкодеры эфира.
+Один PCM-поток feeder'а раздаётся нескольким выходам (кодек, битрейт, mount на каждый).
+У каждого выхода свой FFmpeg и свой поток записи: упавший или зависший mount
+перезапускается отдельно, остальные продолжают вещание. Все выходы получают одни и те же байты PCM;
+feeder кладёт их без ожидания, темп задают только выходы, которые сейчас принимают данные.
+Пока выход переподключается, PCM копится в его кольцевом буфере и проигрывается новому процессу —
+feeder и очередь эфира сбоя не замечают.
+Выход target=local отдаёт поток встроенному серверу (services/stream_server.py) вместо Icecast.
+"""
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from config import (
+    ENCODER_BUFFER_SECONDS,
+    ENCODER_RETRY_MS,
+    ICECAST_HOST,
+    ICECAST_MOUNT,
+    ICECAST_PASSWORD,
+    ICECAST_PORT,
+    STREAM_OUTPUTS,
+    STREAM_SERVER_ENABLED,
+)
+
+from .pcm_cache import BYTES_PER_SECOND, CHANNELS, SAMPLE_RATE, ffmpeg_exe
+from .stream_server import Mount, get_mount
+
+# Кодек → аргументы FFmpeg (без битрейта) и Content-Type для Icecast
+_CODECS = {
+    "mp3": (["-c:a", "libmp3lame"], "audio/mpeg", "mp3"),
+    "opus": (["-c:a", "libopus", "-ar", "48000"], "audio/ogg", "ogg"),
+    "aac": (["-c:a", "aac"], "audio/aac", "adts"),
+}
+
+# Сколько PCM может ждать записи в один выход: мало — часы эфира не убегают от энкодера
+_BUFFER_BYTES = int(ENCODER_BUFFER_SECONDS * BYTES_PER_SECOND) // 2 * 2
+# Выход не принимает данные дольше — считаем зависшим и перезапускаем
+_STALL_TIMEOUT = 5.0
+# Выход не принимал данные дольше — не задаёт темп эфира (до перезапуска по _STALL_TIMEOUT).
+# Меньше буфера выхода: пока feeder ждёт зависший выход, остальные играют из своих буферов
+_PACE_GRACE = 1.0
+# Как часто проверять, жив ли FFmpeg, пока писать нечего
+_HEALTH_INTERVAL = 0.1
+_RESTART_MIN_DELAY = ENCODER_RETRY_MS / 1000
+_RESTART_MAX_DELAY = 30.0
+# Проработал дольше — следующий сбой снова с минимальной задержкой
+_HEALTHY_SECONDS = 60.0
+_READ_SIZE = 16384
+
+
+@dataclass(frozen=True)
+class OutputSpec:
+    """Один выход эфира: mount, кодек, битрейт (кбит/с), куда — icecast | local (встроенный сервер)."""
+    mount: str
+    codec: str = "mp3"
+    bitrate: int = 128
+    target: str = "icecast"
+
+    @property
+    def content_type(self) -> str:
+        return _CODECS[self.codec][1]
+
+    def cmd(self) -> list[str]:
+        codec_args, content_type, fmt = _CODECS[self.codec]
+        if self.target == "local":
+            dest = ["-f", fmt, "pipe:1"]
+        else:
+            url = f"icecast://source:{ICECAST_PASSWORD}@{ICECAST_HOST}:{ICECAST_PORT}/{self.mount}"
+            dest = ["-content_type", content_type, "-f", fmt, url]
+        # PCM в pipe — нет границ MP3, нет "Header missing"
+        return [
+            ffmpeg_exe(),
+            "-loglevel", "warning",
+            "-re",
+            "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", str(CHANNELS),
+            "-i", "pipe:0",
+            *codec_args, "-b:a", f"{self.bitrate}k",
+            *dest,
+        ]
+
+
+def parse_outputs(spec: str = STREAM_OUTPUTS) -> list[OutputSpec]:
+    """
+    Разобрать STREAM_OUTPUTS: "mount:кодек:битрейт[:local],...", например "stream:mp3:128,mobile:mp3:48".
+    Пусто — один выход ICECAST_MOUNT, MP3 128k (как раньше).
+    STREAM_SERVER_ENABLED — каждый Icecast-выход дублируется локальным (отдельный энкодер:
+    сбой Icecast не задевает локальных слушателей). Без ICECAST_PASSWORD остаются только локальные.
+    """
+    outputs: list[OutputSpec] = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        mount, codec, bitrate, target = (item.split(":") + ["", "", ""])[:4]
+        codec = codec.strip().lower() or "mp3"
+        if codec not in _CODECS:
+            print(f"[ENCODER] Неизвестный кодек {codec!r} для {mount}, выход пропущен")
+            continue
+        target = "local" if target.strip().lower() == "local" else "icecast"
+        try:
+            bitrate = int(bitrate) if bitrate.strip() else 128
+        except ValueError:
+            print(f"[ENCODER] Неверный битрейт {bitrate!r} для {mount}, выход пропущен")
+            continue
+        outputs.append(OutputSpec(mount.strip().lstrip("/"), codec, bitrate, target))
+    outputs = outputs or [OutputSpec(ICECAST_MOUNT)]
+    if STREAM_SERVER_ENABLED:
+        local = {o.mount for o in outputs if o.target == "local"}
+        outputs += [
+            OutputSpec(o.mount, o.codec, o.bitrate, "local")
+            for o in outputs
+            if o.target == "icecast" and o.mount not in local
+        ]
+    if not ICECAST_PASSWORD:
+        outputs = [o for o in outputs if o.target == "local"]
+    return outputs
+
+
+class _PcmRing:
+    """
+    Ограниченный буфер PCM одного выхода. Писатель не ждёт: сверх capacity вытесняется самое старое —
+    отставший или переподключающийся выход получает свежий хвост, а не задерживает эфир.
+    Кусок удаляется только после успешной записи в FFmpeg — упавший процесс его не теряет.
+    cond — общий с EncoderFanout: он ждёт на нём, пока выходы освободят место.
+    """
+
+    def __init__(self, capacity: int, cond: threading.Condition | None = None):
+        self.capacity = capacity
+        self.skipped = 0  # байт, вытесненных без проигрывания
+        self._chunks: deque[bytes] = deque()
+        self._size = 0
+        self._closed = False
+        self._cond = cond or threading.Condition()
+
+    @property
+    def has_room(self) -> bool:
+        """Есть место без вытеснения (читать под замком cond)."""
+        return self._size < self.capacity
+
+    def push(self, chunk: bytes) -> None:
+        """Добавить без ожидания, вытесняя самое старое сверх capacity."""
+        with self._cond:
+            self._chunks.append(chunk)
+            self._size += len(chunk)
+            while self._size > self.capacity and len(self._chunks) > 1:
+                old = self._chunks.popleft()
+                self._size -= len(old)
+                self.skipped += len(old)
+            self._cond.notify_all()
+
+    def peek(self, timeout: float) -> bytes | None:
+        """Первый кусок, не удаляя его. None — пусто за timeout или буфер закрыт."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._chunks or self._closed, timeout) or self._closed:
+                return None
+            return self._chunks[0]
+
+    def pop(self) -> None:
+        """Первый кусок записан — удалить."""
+        with self._cond:
+            if self._chunks:
+                self._size -= len(self._chunks.popleft())
+                self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._chunks.clear()
+            self._size = 0
+            self._cond.notify_all()
+
+
+class EncoderOutput:
+    """
+    Один выход: кольцевой буфер PCM → поток записи → FFmpeg. Поток записи следит за процессом,
+    сторож — за тем, что данные уходят: завершился или не принимает _STALL_TIMEOUT — перезапуск
+    (первый через ENCODER_RETRY_MS, дальше дольше).
+    """
+
+    def __init__(self, spec: OutputSpec, cond: threading.Condition | None = None):
+        self.spec = spec
+        self._mount: Mount | None = (
+            get_mount(spec.mount, spec.content_type, spec.bitrate) if spec.target == "local" else None
+        )
+        self.alive = False
+        self.restarts = 0
+        self._ring = _PcmRing(_BUFFER_BYTES, cond)
+        self._proc: subprocess.Popen | None = None
+        self._closed = False
+        # Когда поток записи последний раз отдал кусок FFmpeg или ждал данных (time.monotonic)
+        self._progress = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name=f"encoder-{spec.mount}", daemon=True)
+        self._thread.start()
+        threading.Thread(target=self._watch, name=f"encoder-watch-{spec.mount}", daemon=True).start()
+
+    @property
+    def label(self) -> str:
+        return f"{self.spec.mount} {self.spec.codec} {self.spec.bitrate}k ({self.spec.target})"
+
+    @property
+    def skipped_seconds(self) -> float:
+        """Сколько секунд звука пропущено при переподключениях (не уместилось в буфер)."""
+        return self._ring.skipped / BYTES_PER_SECOND
+
+    @property
+    def pacing(self) -> bool:
+        """Выход жив и принимает данные — по нему держится темп эфира."""
+        return self.alive and time.monotonic() - self._progress < _PACE_GRACE
+
+    @property
+    def ready(self) -> bool:
+        """Задаёт темп и готов принять следующий кусок без вытеснения (читать под замком cond)."""
+        return self.pacing and self._ring.has_room
+
+    def write(self, chunk: bytes) -> None:
+        """Отдать кусок PCM без ожидания: выход отстал или переподключается — старое вытесняется."""
+        self._ring.push(chunk)
+
+    def close(self) -> None:
+        self._closed = True
+        self.alive = False
+        self._ring.close()
+        self._kill()
+
+    def _watch(self) -> None:
+        """Сторож: поток записи не отдаёт данные FFmpeg _STALL_TIMEOUT (завис mount) — перезапуск."""
+        while not self._closed:
+            time.sleep(_HEALTH_INTERVAL)
+            if self.alive and time.monotonic() - self._progress > _STALL_TIMEOUT:
+                print(f"[ENCODER] {self.label}: не принимает данные {_STALL_TIMEOUT:.0f} сек, перезапуск")
+                self._progress = time.monotonic()
+                self._kill()
+
+    def _kill(self) -> None:
+        proc = self._proc
+        if proc and proc.poll() is None:
+            proc.kill()
+
+    def _spawn(self) -> subprocess.Popen:
+        proc = subprocess.Popen(
+            self.spec.cmd(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE if self._mount else subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        threading.Thread(target=self._read_stderr, args=(proc,), daemon=True).start()
+        if self._mount:
+            self._mount.reset()
+            threading.Thread(target=self._read_stdout, args=(proc, self._mount), daemon=True).start()
+        return proc
+
+    def _read_stdout(self, proc: subprocess.Popen, mount: Mount) -> None:
+        """Закодированный поток локального выхода → кольцевой буфер встроенного сервера."""
+        assert proc.stdout is not None
+        while data := proc.stdout.read1(_READ_SIZE):
+            mount.write(data)
+
+    def _read_stderr(self, proc: subprocess.Popen) -> None:
+        if proc.stderr:
+            for line in proc.stderr:
+                s = line.decode("utf-8", errors="replace").strip()
+                if s:
+                    print(f"[FFmpeg {self.spec.mount}] {s}")
+
+    def _pump(self, proc: subprocess.Popen) -> None:
+        """Буфер → stdin FFmpeg, пока процесс жив. Кусок снимается с буфера только после записи."""
+        assert proc.stdin is not None
+        while not self._closed:
+            if proc.poll() is not None:
+                print(f"[ENCODER] {self.label}: FFmpeg завершился (код {proc.returncode})")
+                return
+            chunk = self._ring.peek(_HEALTH_INTERVAL)
+            if chunk is None:
+                self._progress = time.monotonic()
+                continue
+            proc.stdin.write(chunk)
+            proc.stdin.flush()
+            self._ring.pop()
+            self._progress = time.monotonic()
+
+    def _run(self) -> None:
+        delay = _RESTART_MIN_DELAY
+        while not self._closed:
+            started = time.monotonic()
+            try:
+                self._proc = proc = self._spawn()
+            except OSError as e:
+                print(f"[ENCODER] {self.label}: FFmpeg не запущен: {e}")
+            else:
+                self._progress = time.monotonic()
+                self.alive = True
+                try:
+                    self._pump(proc)
+                except (BrokenPipeError, OSError):
+                    pass
+                finally:
+                    self.alive = False
+                    try:
+                        proc.stdin.close()
+                    except OSError:
+                        pass
+                    try:
+                        proc.wait(timeout=_STALL_TIMEOUT)
+                    except subprocess.TimeoutExpired:
+                        proc.kill()
+                        proc.wait()
+            if self._closed:
+                return
+            if time.monotonic() - started > _HEALTHY_SECONDS:
+                delay = _RESTART_MIN_DELAY
+            print(f"[ENCODER] {self.label}: выход упал, перезапуск через {delay:.2f} сек")
+            time.sleep(delay)
+            delay = min(delay * 2, _RESTART_MAX_DELAY)
+            self.restarts += 1
+
+
+class EncoderFanout:
+    """
+    Все выходы эфира за интерфейсом файла (write/flush/close) — feeder пишет PCM один раз.
+    Темп задают энкодеры (-re), принимающие данные: write ждёт, пока место появится у каждого из них.
+    Зависший выход темп не держит дольше _PACE_GRACE; если принимающих нет — держим реальное время сами.
+    """
+
+    def __init__(self, specs: list[OutputSpec] | None = None):
+        self._cond = threading.Condition()
+        self.outputs = [EncoderOutput(s, self._cond) for s in (specs or parse_outputs())]
+        for o in self.outputs:
+            print(f"[ENCODER] Выход: {o.label}")
+
+    def write(self, chunk: bytes) -> None:
+        # Каждому выходу без ожидания, в том числе переподключающимся (им — в буфер)
+        for o in self.outputs:
+            o.write(chunk)
+        with self._cond:
+            while pacing := [o for o in self.outputs if o.pacing]:
+                if all(o.ready for o in pacing):
+                    return
+                self._cond.wait(_HEALTH_INTERVAL)
+        time.sleep(len(chunk) / BYTES_PER_SECOND)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        for o in self.outputs:
+            o.close()
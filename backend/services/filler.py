@@ -0,0 +1,107 @@
+"""
+NAVO RADIO — аварийный резерв эфира.
+Когда подготовка не успевает (Jamendo/Groq/TTS недоступны), feeder ставит в эфир заставки
+и уже игравшие треки из кэша вместо тишины. PCM резерва декодируется заранее в фоне,
+поэтому feeder не ждёт ни сети, ни FFmpeg. Элемент не повторяется чаще FILLER_NO_REPEAT_MINUTES.
+"""
+import random
+import threading
+import time
+from pathlib import Path
+
+from config import CACHE_DIR, FILLER_NO_REPEAT_MINUTES, FILLER_POOL_SIZE, JINGLES_DIR
+
+from .cache_manager import is_pinned
+from .metrics import Counter
+from .pcm_cache import ensure_pcm
+
+# Как часто пересобирать резерв: в кэше появляются новые треки, старые вытесняются
+_RESCAN_SECONDS = 120
+_DEFAULT_TITLE = "NAVO RADIO"
+
+FILLER_ITEMS = Counter("navo_filler_items_total", "Элементы аварийного резерва, поставленные в эфир (jingle, track)")
+
+
+def _last_used(path: Path) -> float:
+    try:
+        return path.stat().st_atime
+    except OSError:
+        return 0.0
+
+
+class FillerPool:
+    """Заставки + FILLER_POOL_SIZE недавно игравших треков из кэша, у всех готов PCM."""
+
+    def __init__(self, size: int = FILLER_POOL_SIZE, no_repeat_minutes: float = FILLER_NO_REPEAT_MINUTES):
+        self._size = size
+        self._no_repeat = no_repeat_minutes * 60
+        self._ready: list[Path] = []
+        # Имя файла → когда звучал в эфире (time.monotonic) и что показывать слушателям
+        self._played: dict[str, float] = {}
+        self._titles: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="filler", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[FILLER] Ошибка обновления резерва: {e}")
+            time.sleep(_RESCAN_SECONDS)
+
+    def refresh(self) -> None:
+        """Собрать резерв и декодировать его в PCM (обычно уже есть — треки игрались)."""
+        jingles = sorted(JINGLES_DIR.glob("*.mp3")) if JINGLES_DIR.exists() else []
+        tracks = sorted(CACHE_DIR.glob("track_*.mp3"), key=_last_used, reverse=True)[: self._size]
+        ready = [p for p in jingles + tracks if ensure_pcm(p)]
+        with self._lock:
+            self._ready = ready
+        print(f"[FILLER] Резерв: {len(ready)} элементов")
+
+    def note_played(self, path: Path, title: str | None = None) -> None:
+        """Элемент начал звучать (вызывает feeder) — не брать его в резерв до конца окна повтора."""
+        with self._lock:
+            self._played[path.name] = time.monotonic()
+            if title:
+                self._titles[path.name] = title
+
+    def pick(self) -> Path | None:
+        """
+        Элемент резерва: дольше всех не звучавший (никогда не звучавшие — в случайном порядке).
+        None — всё звучало недавно или ждёт эфира в очереди: лучше тишина, чем повтор.
+        """
+        now = time.monotonic()
+        with self._lock:
+            played = dict(self._played)
+            ready = list(self._ready)
+        fresh = [
+            p for p in ready
+            if now - played.get(p.name, float("-inf")) >= self._no_repeat and not is_pinned(p) and p.exists()
+        ]
+        if not fresh:
+            return None
+        random.shuffle(fresh)
+        return min(fresh, key=lambda p: played.get(p.name, float("-inf")))
+
+    def title_for(self, path: Path) -> str:
+        with self._lock:
+            return self._titles.get(path.name, _DEFAULT_TITLE)
+
+    @staticmethod
+    def kind(path: Path) -> str:
+        return "jingle" if path.parent.resolve() == JINGLES_DIR.resolve() else "track"
+
+
+_pool: FillerPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_filler() -> FillerPool:
+    """Общий резерв (создаётся при первом обращении, сразу начинает собираться в фоне)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = FillerPool()
+        return _pool
@@ -1,10 +1,101 @@
 """
 NAVO RADIO — Groq AI.
 Генерация текстов: DJ-интро, сценарии новостей и погоды.
+Один общий клиент (пул соединений), интро — пачкой на несколько треков одним запросом
+и с кэшем ответов по id трека и версии промпта.
 """
-from groq import Groq
+import json
+import threading
+from typing import TYPE_CHECKING
+
+from config import CACHE_DIR, GROQ_API_KEY
+
+from .cache_manager import atomic_write
+from .jamendo import Track
+from .metrics import CACHE_LOOKUPS, STAGE_SECONDS
+
+if TYPE_CHECKING:
+    from groq import Groq
+
+MODEL = "llama-3.3-70b-versatile"
+
+# Версия промптов интро: поменяли текст промпта — увеличить, старые ответы кэша не используются
+INTRO_PROMPT_VERSION = 1
+INTRO_CACHE_PATH = CACHE_DIR / "groq_intros.json"
+_INTRO_CACHE_MAX = 5000
+
+_client: "Groq | None" = None
+_intro_cache: dict[str, str] | None = None
+_lock = threading.Lock()
+
+
+def _get_client() -> "Groq":
+    """
+    Общий клиент Groq: HTTP-соединения переиспользуются между запросами.
+    SDK импортируется здесь, а не при старте — он самый тяжёлый импорт бэкенда.
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            from groq import Groq
+
+            _client = Groq(api_key=GROQ_API_KEY)
+        return _client
+
+
+def _chat(prompt: str, max_tokens: int, temperature: float, json_mode: bool = False) -> str:
+    kwargs = {"response_format": {"type": "json_object"}} if json_mode else {}
+    with STAGE_SECONDS.time(stage="groq"):
+        response = _get_client().chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **kwargs,
+        )
+    return (response.choices[0].message.content or "").strip()
+
+
+def _cache_key(track_id: str) -> str:
+    return f"v{INTRO_PROMPT_VERSION}:{track_id}"
+
+
+def _load_intro_cache() -> dict[str, str]:
+    global _intro_cache
+    if _intro_cache is None:
+        try:
+            _intro_cache = json.loads(INTRO_CACHE_PATH.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            _intro_cache = {}
+    return _intro_cache
+
+
+def _cached_intro(track_id: str | None) -> str | None:
+    if not track_id:
+        return None
+    with _lock:
+        text = _load_intro_cache().get(_cache_key(track_id))
+    CACHE_LOOKUPS.inc(cache="groq", result="hit" if text else "miss")
+    return text
+
+
+def _store_intros(intros: dict[str, str]) -> None:
+    """Сохранить интро в кэш ответов (старые записи вытесняются сверх _INTRO_CACHE_MAX)."""
+    if not intros:
+        return
+    with _lock:
+        cache = _load_intro_cache()
+        for track_id, text in intros.items():
+            cache.pop(_cache_key(track_id), None)
+            cache[_cache_key(track_id)] = text
+        for old in list(cache)[: max(0, len(cache) - _INTRO_CACHE_MAX)]:
+            del cache[old]
+        try:
+            with atomic_write(INTRO_CACHE_PATH) as tmp:
+                tmp.write_text(json.dumps(cache, ensure_ascii=False), encoding="utf-8")
+        except OSError as e:
+            print(f"[GROQ] Не удалось сохранить кэш интро: {e}")
 
-from config import GROQ_API_KEY
 
 DJ_INTRO_PROMPT = """Ты — ведущий радио NAVO RADIO. Перед треком нужно сказать 2-3 короткие фразы на русском.
 Трек: "{track_name}"
@@ -18,31 +109,84 @@ def _fallback_intro(track_name: str, artist_name: str) -> str:
     return f"Сейчас в эфире — {artist_name} с композицией {track_name}."
 
 
-def generate_dj_intro(track_name: str, artist_name: str, album_name: str = "") -> str:
-    """Сгенерировать DJ-интро перед треком."""
+def generate_dj_intro(
+    track_name: str,
+    artist_name: str,
+    album_name: str = "",
+    track_id: str | None = None,
+) -> str:
+    """Сгенерировать DJ-интро перед треком. С track_id — сначала кэш ответов (в т.ч. от пачки)."""
     if not GROQ_API_KEY:
         return _fallback_intro(track_name, artist_name)
 
+    cached = _cached_intro(track_id)
+    if cached:
+        return cached
+
     try:
-        client = Groq(api_key=GROQ_API_KEY)
         prompt = DJ_INTRO_PROMPT.format(
             track_name=track_name,
             artist_name=artist_name,
             album_name=album_name or "—",
         )
+        text = _chat(prompt, max_tokens=150, temperature=0.7)
+        if not text:
+            return _fallback_intro(track_name, artist_name)
+        if track_id:
+            _store_intros({track_id: text})
+        return text
+    except Exception as e:
+        print(f"[GROQ] Ошибка, используем fallback: {e}")
+        return _fallback_intro(track_name, artist_name)
 
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=150,
+
+DJ_INTRO_BATCH_PROMPT = """Ты — ведущий радио NAVO RADIO. Для каждого трека ниже нужно сказать 2-3 короткие фразы на русском перед его началом.
+
+Треки:
+{tracks}
+
+Для каждого трека — 1-3 предложения, неформально, тепло, без кавычек и пояснений. Не упоминай название трека в конце.
+Ответь JSON-объектом вида {{"intros": [{{"id": "<id трека>", "text": "<текст для озвучки>"}}]}}"""
+
+
+def generate_dj_intros(tracks: list[Track]) -> dict[str, str]:
+    """
+    Интро для нескольких треков одним запросом (JSON), результат — в кэш ответов.
+    Возвращает {track_id: текст}; треков без ответа в словаре нет — для них generate_dj_intro.
+    """
+    if not GROQ_API_KEY or not tracks:
+        return {}
+
+    result = {t.id: text for t in tracks if (text := _cached_intro(t.id))}
+    missing = [t for t in tracks if t.id not in result]
+    if not missing:
+        return result
+
+    lines = "\n".join(
+        f'- id={t.id}: "{t.name}", исполнитель: {t.artist_name}, альбом: {t.album_name or "—"}'
+        for t in missing
+    )
+    try:
+        raw = _chat(
+            DJ_INTRO_BATCH_PROMPT.format(tracks=lines),
+            max_tokens=150 * len(missing),
             temperature=0.7,
+            json_mode=True,
         )
-
-        text = response.choices[0].message.content.strip()
-        return text if text else _fallback_intro(track_name, artist_name)
+        wanted = {t.id for t in missing}
+        fresh = {
+            str(item.get("id")): str(item.get("text", "")).strip()
+            for item in json.loads(raw).get("intros", [])
+            if isinstance(item, dict)
+        }
+        fresh = {k: v for k, v in fresh.items() if k in wanted and v}
     except Exception as e:
-        print(f"[GROQ] Ошибка, используем fallback: {e}")
-        return _fallback_intro(track_name, artist_name)
+        print(f"[GROQ] Ошибка пачки интро: {e}")
+        return result
+
+    _store_intros(fresh)
+    result.update(fresh)
+    return result
 
 
 NEWS_SCRIPT_PROMPT = """Ты — ведущий радио NAVO RADIO. На основе этих новостей из Таджикистана/Душанбе составь короткий выпуск новостей на русском.
@@ -52,24 +196,22 @@ NEWS_SCRIPT_PROMPT = """Ты — ведущий радио NAVO RADIO. На ос
 {news_text}"""
 
 
+# Заглушки, когда сценарий получить не удалось (не кэшируются как готовый сценарий)
+NEWS_UNAVAILABLE = "Новости временно недоступны."
+WEATHER_UNAVAILABLE = "Прогноз погоды временно недоступен."
+
+
 def generate_news_script(news_text: str) -> str:
     """Сгенерировать сценарий выпуска новостей."""
     if not GROQ_API_KEY or not news_text.strip():
-        return "Новости временно недоступны."
+        return NEWS_UNAVAILABLE
 
     try:
-        client = Groq(api_key=GROQ_API_KEY)
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": NEWS_SCRIPT_PROMPT.format(news_text=news_text[:3000])}],
-            max_tokens=300,
-            temperature=0.3,
-        )
-        text = response.choices[0].message.content.strip()
-        return text if text else "Новости временно недоступны."
+        text = _chat(NEWS_SCRIPT_PROMPT.format(news_text=news_text[:3000]), max_tokens=300, temperature=0.3)
+        return text if text else NEWS_UNAVAILABLE
     except Exception as e:
         print(f"[GROQ] Ошибка новостей: {e}")
-        return "Новости временно недоступны."
+        return NEWS_UNAVAILABLE
 
 
 WEATHER_SCRIPT_PROMPT = """Ты — ведущий радио NAVO RADIO. Озвучь прогноз погоды для Душанбе на русском.
@@ -80,18 +222,11 @@ WEATHER_SCRIPT_PROMPT = """Ты — ведущий радио NAVO RADIO. Озв
 def generate_weather_script(weather_data: str) -> str:
     """Сгенерировать сценарий погоды."""
     if not GROQ_API_KEY or not weather_data.strip():
-        return "Прогноз погоды временно недоступен."
+        return WEATHER_UNAVAILABLE
 
     try:
-        client = Groq(api_key=GROQ_API_KEY)
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": WEATHER_SCRIPT_PROMPT.format(weather_data=weather_data)}],
-            max_tokens=150,
-            temperature=0.3,
-        )
-        text = response.choices[0].message.content.strip()
-        return text if text else "Прогноз погоды временно недоступен."
+        text = _chat(WEATHER_SCRIPT_PROMPT.format(weather_data=weather_data), max_tokens=150, temperature=0.3)
+        return text if text else WEATHER_UNAVAILABLE
     except Exception as e:
         print(f"[GROQ] Ошибка погоды: {e}")
-        return "Прогноз погоды временно недоступен."
+        return WEATHER_UNAVAILABLE
@@ -0,0 +1,109 @@
+"""
+NAVO RADIO — стартовая заставка (ident).
+Готовый PCM заставки с уже применённой нормализацией громкости лежит в CACHE_DIR:
+при холодном старте feeder пишет его в энкодер сразу — без FFmpeg, numpy, хэширования файла
+и очереди. Пересобирается в фоне после старта, если заставка сменилась или измерена громкость.
+"""
+import json
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+from config import CACHE_DIR, JINGLE_FILE, JINGLES_DIR
+
+from .cache_manager import atomic_write
+from .loudness import apply_gain, gain_for
+from .pcm_cache import BYTES_PER_SECOND, ensure_pcm, iter_pcm
+
+# Не .pcm — менеджер кэша не вытесняет заставку вместе с треками
+IDENT_PCM = CACHE_DIR / "startup_ident.s16le"
+IDENT_META = CACHE_DIR / "startup_ident.json"
+
+_build_lock = threading.Lock()
+
+
+class IdentItem:
+    """Стартовая заставка как элемент эфира: feeder играет её до первого элемента очереди."""
+
+    name = "ident"
+    title = "NAVO RADIO"
+    decoded = True
+
+    def __init__(self, pcm: Path, source: Path):
+        self.pcm = pcm
+        self.source = source  # файл заставки, из которого собран PCM
+        self.size = pcm.stat().st_size
+
+    @property
+    def duration(self) -> float:
+        return self.size / BYTES_PER_SECOND
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return True
+
+    def cancel(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+    def chunks(self) -> Iterator[bytes]:
+        yield from iter_pcm(self.pcm)
+
+    def parts(self) -> Iterator[tuple[str, Iterator[bytes]]]:
+        yield "track", self.chunks()
+
+
+def load_ident() -> IdentItem | None:
+    """Готовая заставка или None (первый запуск, заставки нет)."""
+    try:
+        item = IdentItem(IDENT_PCM, _source())
+    except OSError:
+        return None
+    return item if item.size else None
+
+
+def _source() -> Path:
+    return JINGLES_DIR / JINGLE_FILE
+
+
+def _signature(source: Path, gain: float) -> dict:
+    st = source.stat()
+    return {"source": str(source), "size": st.st_size, "mtime_ns": st.st_mtime_ns, "gain": round(gain, 4)}
+
+
+def build_ident() -> bool:
+    """Собрать PCM заставки, если его нет или источник/громкость изменились. True — пересобран."""
+    source = _source()
+    with _build_lock:
+        if not source.exists():
+            return False
+        gain = gain_for(source)
+        sig = _signature(source, gain)
+        try:
+            if IDENT_PCM.exists() and json.loads(IDENT_META.read_text(encoding="utf-8")) == sig:
+                return False
+        except (OSError, ValueError):
+            pass
+        pcm = ensure_pcm(source)
+        if pcm is None:
+            return False
+        try:
+            with atomic_write(IDENT_PCM) as tmp, open(tmp, "wb") as f:
+                for chunk in apply_gain(iter_pcm(pcm), gain):
+                    f.write(chunk)
+            IDENT_META.write_text(json.dumps(sig), encoding="utf-8")
+        except OSError as e:
+            # Windows: файл открыт feeder'ом — соберём при следующем старте
+            print(f"[IDENT] Не удалось обновить заставку: {e}")
+            return False
+        print(f"[IDENT] Стартовая заставка готова: {source.name}")
+        return True
+
+
+def build_ident_async() -> None:
+    """Собрать заставку в фоне — к следующему запуску (или перезапуску после сбоя)."""
+    threading.Thread(target=build_ident, name="ident", daemon=True).start()
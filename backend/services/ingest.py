@@ -0,0 +1,141 @@
+"""
+NAVO RADIO — условная загрузка источников блоков (RSS новостей, погода).
+Запрос с If-None-Match / If-Modified-Since: на 304 берётся прошлый ответ без загрузки и разбора.
+По нормализованному содержимому считается отпечаток: пока он тот же, сценарий Groq не
+запрашивается заново, а тот же текст сценария — попадание в кэш TTS (аудио не синтезируется).
+Состояние (валидаторы, последний текст, сценарий) переживает перезапуск — CACHE_DIR/ingest.json.
+"""
+import hashlib
+import html
+import json
+import re
+import threading
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+from config import CACHE_DIR, INGEST_MAX_STALE_MINUTES
+
+from .cache_manager import atomic_write
+from .downloader import get_session
+from .metrics import CACHE_LOOKUPS
+
+if TYPE_CHECKING:
+    import requests
+
+STATE_PATH = CACHE_DIR / "ingest.json"
+# Повторный запрос к источнику раньше не нужен: опрос наперёд только что его обновил
+_FRESH_SECONDS = 60
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+
+_state: dict[str, dict] | None = None
+_lock = threading.Lock()
+
+
+def normalize(text: str) -> str:
+    """Текст без HTML-разметки, сущностей и лишних пробелов."""
+    return _SPACE_RE.sub(" ", html.unescape(_TAG_RE.sub(" ", text))).strip()
+
+
+def fingerprint(text: str) -> str:
+    """Отпечаток содержимого: регистр и пробелы/разметка не считаются изменением."""
+    return hashlib.sha1(normalize(text).lower().encode("utf-8")).hexdigest()
+
+
+def _load() -> dict[str, dict]:
+    global _state
+    if _state is None:
+        try:
+            _state = json.loads(STATE_PATH.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            _state = {}
+    return _state
+
+
+def _get(name: str) -> dict:
+    with _lock:
+        return dict(_load().get(name, {}))
+
+
+def _update(name: str, **fields) -> None:
+    with _lock:
+        state = _load()
+        state[name] = {**state.get(name, {}), **fields}
+        try:
+            with atomic_write(STATE_PATH) as tmp:
+                tmp.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
+        except OSError as e:
+            print(f"[INGEST] Не удалось сохранить состояние: {e}")
+
+
+def fetch(
+    name: str,
+    url: str,
+    parse: Callable[["requests.Response"], str],
+    params: dict | None = None,
+    timeout: float = 15,
+) -> str:
+    """
+    Текст источника name: parse(resp) разбирает свежий ответ.
+    304 или запрос в пределах _FRESH_SECONDS — прошлый текст. Источник недоступен — прошлый текст,
+    если он не старше INGEST_MAX_STALE_MINUTES, иначе "" (блок скажет, что данных нет).
+    """
+    st = _get(name)
+    now = time.time()
+    cached = st.get("text")
+    if cached and now - st.get("fetched_at", 0) < _FRESH_SECONDS:
+        return cached
+
+    headers = {}
+    if cached:
+        if st.get("etag"):
+            headers["If-None-Match"] = st["etag"]
+        if st.get("last_modified"):
+            headers["If-Modified-Since"] = st["last_modified"]
+    try:
+        resp = get_session().get(url, params=params, headers=headers, timeout=timeout)
+        if resp.status_code == 304 and cached:
+            CACHE_LOOKUPS.inc(cache=name, result="hit")
+            _update(name, fetched_at=now)
+            return cached
+        resp.raise_for_status()
+        text = parse(resp)
+    except Exception as e:
+        print(f"[INGEST] {name}: ошибка загрузки: {e}")
+        if cached and now - st.get("fetched_at", 0) < INGEST_MAX_STALE_MINUTES * 60:
+            print(f"[INGEST] {name}: в эфир — последние полученные данные")
+            return cached
+        return ""
+
+    CACHE_LOOKUPS.inc(cache=name, result="miss")
+    _update(
+        name,
+        etag=resp.headers.get("ETag"),
+        last_modified=resp.headers.get("Last-Modified"),
+        text=text,
+        fetched_at=now,
+    )
+    return text
+
+
+def script_for(name: str, text: str, generate: Callable[[str], str], unavailable: str) -> str:
+    """
+    Сценарий для текста источника: отпечаток не изменился — прежний сценарий без запроса к Groq.
+    Заглушку unavailable не запоминаем — в следующий раз попробуем снова.
+    """
+    if not text.strip():
+        return generate(text)
+    fp = fingerprint(text)
+    st = _get(name)
+    if st.get("fingerprint") == fp and st.get("script"):
+        CACHE_LOOKUPS.inc(cache=f"{name}_script", result="hit")
+        print(f"[INGEST] {name}: без изменений — прежний сценарий")
+        return st["script"]
+
+    CACHE_LOOKUPS.inc(cache=f"{name}_script", result="miss")
+    script = generate(text)
+    if script != unavailable:
+        _update(name, fingerprint=fp, script=script)
+    return script
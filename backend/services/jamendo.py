@@ -6,11 +6,13 @@ import random
 from dataclasses import dataclass
 from pathlib import Path
 
-import requests
+from config import CACHE_DIR, JAMENDO_API_URL, JAMENDO_CLIENT_ID
 
-from config import CACHE_DIR, JAMENDO_CLIENT_ID
+from .cache_manager import touch
+from .downloader import download, get_session
+from .metrics import CACHE_LOOKUPS
 
-API_BASE = "https://api.jamendo.com/v3.0/tracks"
+API_BASE = JAMENDO_API_URL
 # Теги: восточная музыка, приоритет — Таджикистан и Центральная Азия
 # tajik — таджикские артисты; oriental — восточная; persian — персидская; asia — азиатская
 TAGS = ["tajik", "oriental", "persian", "asia", "world", "folk", "ethnic"]
@@ -27,8 +29,13 @@ class Track:
     audio_url: str
 
 
-def fetch_tracks(limit: int = 50, tag: str | None = None) -> list[Track]:
-    """Получить треки из Jamendo API."""
+def fetch_tracks(
+    limit: int = 50,
+    tag: str | None = None,
+    offset: int = 0,
+    order: str | None = None,
+) -> list[Track]:
+    """Получить треки из Jamendo API (offset/order — для постраничной выгрузки в каталог)."""
     if not JAMENDO_CLIENT_ID:
         raise ValueError("JAMENDO_CLIENT_ID не задан в .env")
 
@@ -39,8 +46,12 @@ def fetch_tracks(limit: int = 50, tag: str | None = None) -> list[Track]:
     }
     if tag:
         params["tags"] = tag
+    if offset:
+        params["offset"] = offset
+    if order:
+        params["order"] = order
 
-    resp = requests.get(API_BASE, params=params, timeout=30)
+    resp = get_session().get(API_BASE, params=params, timeout=30)
     resp.raise_for_status()
     data = resp.json()
 
@@ -67,9 +78,18 @@ def fetch_tracks(limit: int = 50, tag: str | None = None) -> list[Track]:
 
 
 def get_next_track() -> Track | None:
-    """Получить случайный трек из пула восточной музыки (приоритет — таджикская, восточная)."""
+    """
+    Получить случайный трек из пула восточной музыки (приоритет — таджикская, восточная).
+    Сначала — локальный каталог; пока он пуст, запрос к API напрямую.
+    """
+    from .jamendo_catalog import pick_track, start_refresh
+
     tags_to_try = list(TAGS)
     random.shuffle(tags_to_try)
+    start_refresh()
+    track = pick_track(tags_to_try)
+    if track:
+        return track
     for tag in tags_to_try:
         tracks = fetch_tracks(limit=30, tag=tag)
         if tracks:
@@ -77,19 +97,21 @@ def get_next_track() -> Track | None:
     return None
 
 
+def cache_path(track: Track) -> Path:
+    """Куда трек скачивается в кэше (файл может ещё не существовать)."""
+    return CACHE_DIR / f"track_{track.id}.mp3"
+
+
 def download_track(track: Track) -> Path:
     """Скачать трек в кэш, вернуть путь к файлу."""
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    path = CACHE_DIR / f"track_{track.id}.mp3"
+    path = cache_path(track)
 
     if path.exists():
+        CACHE_LOOKUPS.inc(cache="track", result="hit")
+        touch(path)
         return path
 
-    resp = requests.get(track.audio_url, timeout=120, stream=True)
-    resp.raise_for_status()
-
-    with open(path, "wb") as f:
-        for chunk in resp.iter_content(chunk_size=8192):
-            f.write(chunk)
-
-    return path
+    CACHE_LOOKUPS.inc(cache="track", result="miss")
+    # Докачка после обрыва, проверка размера и декодирования; track_*.mp3 появляется только целиком
+    return download(track.audio_url, path)
@@ -0,0 +1,195 @@
+"""
+NAVO RADIO — локальный каталог Jamendo.
+SQLite в CACHE_DIR: треки по тегам, наполняется постраничными запросами в фоне.
+Выбор трека — локальный индексированный запрос, эфир не зависит от доступности API.
+"""
+import sqlite3
+import threading
+import time
+
+from config import CACHE_DIR, CATALOG_MAX_PER_TAG, CATALOG_REFRESH_MINUTES
+
+from .jamendo import TAGS, Track, fetch_tracks
+
+DB_PATH = CACHE_DIR / "jamendo_catalog.sqlite3"
+# Максимум Jamendo API на одну страницу
+PAGE_SIZE = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    artist_name TEXT NOT NULL,
+    album_name TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    audio_url TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_played REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS track_tags (
+    tag TEXT NOT NULL,
+    track_id TEXT NOT NULL REFERENCES tracks(id),
+    PRIMARY KEY (tag, track_id)
+);
+CREATE INDEX IF NOT EXISTS idx_tracks_last_played ON tracks(last_played);
+CREATE TABLE IF NOT EXISTS tag_state (
+    tag TEXT PRIMARY KEY,
+    refreshed_at REAL NOT NULL,
+    backfill_offset INTEGER NOT NULL DEFAULT 0,
+    complete INTEGER NOT NULL DEFAULT 0
+);
+"""
+# Колонки, добавленные в tag_state после первой версии каталога
+_TAG_STATE_COLUMNS = {
+    "backfill_offset": "INTEGER NOT NULL DEFAULT 0",
+    "complete": "INTEGER NOT NULL DEFAULT 0",
+}
+
+_conn: sqlite3.Connection | None = None
+_lock = threading.Lock()
+_refresher: threading.Thread | None = None
+
+
+def _db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        _conn.executescript(_SCHEMA)
+        columns = {r[1] for r in _conn.execute("PRAGMA table_info(tag_state)")}
+        with _conn:
+            for name, decl in _TAG_STATE_COLUMNS.items():
+                if name not in columns:
+                    _conn.execute(f"ALTER TABLE tag_state ADD COLUMN {name} {decl}")
+    return _conn
+
+
+def _row_to_track(row: tuple) -> Track:
+    return Track(
+        id=row[0],
+        name=row[1],
+        artist_name=row[2],
+        album_name=row[3],
+        duration=row[4],
+        audio_url=row[5],
+    )
+
+
+def store_tracks(tag: str, tracks: list[Track]) -> int:
+    """Сохранить треки тега. Возвращает число новых для этого тега."""
+    now = time.time()
+    with _lock:
+        db = _db()
+        known = {
+            r[0]
+            for r in db.execute(
+                f"SELECT track_id FROM track_tags WHERE tag = ? AND track_id IN ({','.join('?' * len(tracks))})",
+                (tag, *[t.id for t in tracks]),
+            )
+        } if tracks else set()
+        with db:
+            for t in tracks:
+                db.execute(
+                    """INSERT INTO tracks (id, name, artist_name, album_name, duration, audio_url, fetched_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(id) DO UPDATE SET
+                           name = excluded.name, artist_name = excluded.artist_name,
+                           album_name = excluded.album_name, duration = excluded.duration,
+                           audio_url = excluded.audio_url, fetched_at = excluded.fetched_at""",
+                    (t.id, t.name, t.artist_name, t.album_name, t.duration, t.audio_url, now),
+                )
+                db.execute("INSERT OR IGNORE INTO track_tags (tag, track_id) VALUES (?, ?)", (tag, t.id))
+    return len({t.id for t in tracks} - known)
+
+
+def _tag_state(tag: str) -> tuple[int, bool]:
+    """Прогресс первичного наполнения тега: (следующий offset, завершено ли)."""
+    with _lock:
+        row = _db().execute(
+            "SELECT backfill_offset, complete FROM tag_state WHERE tag = ?", (tag,)
+        ).fetchone()
+    return (row[0], bool(row[1])) if row else (0, False)
+
+
+def _save_tag_state(tag: str, offset: int, complete: bool) -> None:
+    with _lock, _db() as db:
+        db.execute(
+            """INSERT OR REPLACE INTO tag_state (tag, refreshed_at, backfill_offset, complete)
+               VALUES (?, ?, ?, ?)""",
+            (tag, time.time(), offset, int(complete)),
+        )
+
+
+def refresh_tag(tag: str) -> int:
+    """
+    Подтянуть треки тега. Пока каталог тега не наполнен до CATALOG_MAX_PER_TAG — страницы подряд
+    с сохранённого offset (прерванный сбоем проход продолжается, а не начинается заново).
+    После — только новинки: страницы новых релизов, пока попадаются незнакомые треки.
+    """
+    offset, complete = _tag_state(tag)
+    if complete:
+        offset = 0
+    added = 0
+    while offset < CATALOG_MAX_PER_TAG:
+        page = fetch_tracks(limit=PAGE_SIZE, tag=tag, offset=offset, order="releasedate_desc")
+        new = store_tracks(tag, page)
+        added += new
+        offset += PAGE_SIZE
+        if len(page) < PAGE_SIZE:
+            break
+        if complete:
+            if new == 0:
+                break
+        else:
+            _save_tag_state(tag, offset, False)
+    _save_tag_state(tag, 0, True)
+    return added
+
+
+def refresh_all() -> None:
+    for tag in TAGS:
+        try:
+            added = refresh_tag(tag)
+            if added:
+                print(f"[CATALOG] {tag}: +{added} треков")
+        except Exception as e:
+            print(f"[CATALOG] Ошибка обновления {tag}: {e}")
+
+
+def _refresh_loop() -> None:
+    while True:
+        refresh_all()
+        time.sleep(CATALOG_REFRESH_MINUTES * 60)
+
+
+def start_refresh() -> None:
+    """Запустить фоновое обновление каталога (один раз)."""
+    global _refresher
+    with _lock:
+        if _refresher and _refresher.is_alive():
+            return
+        _refresher = threading.Thread(target=_refresh_loop, name="jamendo-catalog", daemon=True)
+        _refresher.start()
+
+
+def pick_track(tags: list[str]) -> Track | None:
+    """
+    Выбрать трек из каталога: первый тег из списка, где есть треки.
+    Давно не звучавшие — в приоритете; выбранный помечается сыгранным.
+    """
+    with _lock:
+        db = _db()
+        for tag in tags:
+            row = db.execute(
+                """SELECT t.id, t.name, t.artist_name, t.album_name, t.duration, t.audio_url
+                   FROM track_tags g JOIN tracks t ON t.id = g.track_id
+                   WHERE g.tag = ?
+                   ORDER BY t.last_played, RANDOM()
+                   LIMIT 1""",
+                (tag,),
+            ).fetchone()
+            if row:
+                with db:
+                    db.execute("UPDATE tracks SET last_played = ? WHERE id = ?", (time.time(), row[0]))
+                return _row_to_track(row)
+    return None
@@ -1,6 +1,7 @@
 """
 NAVO RADIO — аудиозаставка.
-Короткий mp3 (название радио) раз в час.
+Короткий mp3 (название радио) раз в час — точно на границе: перед ждущими эфира треками,
+а трек, который звучит, прерывается.
 """
 from pathlib import Path
 
@@ -17,7 +18,7 @@ def run_jingle_block() -> bool:
         print(f"[JINGLE] Файл не найден: {jingle_path}. Положите jingle.mp3 в папку jingles/")
         return False
 
-    if start_continuous_stream() and enqueue_track(None, jingle_path):
+    if start_continuous_stream() and enqueue_track(None, jingle_path, title="NAVO RADIO", priority=True):
         print("[JINGLE] Заставка")
         return True
     return False
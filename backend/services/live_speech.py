@@ -0,0 +1,33 @@
+"""
+NAVO RADIO — речь в эфир по мере синтеза.
+Куски MP3 от TTS сразу декодируются и уходят в очередь эфира через джиттер-буфер:
+слушатель слышит начало выпуска примерно через секунду, а не после записи всего файла.
+"""
+from .streamer import enqueue_live, enqueue_track, start_continuous_stream
+from .tts import cached_tts_path, stream_tts
+
+
+def speak(text: str, name: str = "live", title: str | None = None, priority: bool = False) -> bool:
+    """
+    Поставить текст в эфир. Фраза уже в кэше — обычный элемент из файла,
+    иначе — живой элемент, который заполняется по ходу синтеза. True — поставлено в очередь.
+    priority — перед треками, которые ещё ждут эфира, трек в эфире прерывается (якорные блоки).
+    """
+    if not start_continuous_stream():
+        return False
+    cached = cached_tts_path(text)
+    if cached is not None:
+        return enqueue_track(None, cached, title=title, priority=priority)
+
+    item = enqueue_live(name, title=title, priority=priority)
+    if item is None:
+        return False
+    future = stream_tts(text, item.write)
+
+    def _done(f) -> None:
+        item.end_input()
+        if f.exception() is not None:
+            print(f"[TTS] Ошибка потокового синтеза ({name}): {f.exception()}")
+
+    future.add_done_callback(_done)
+    return True
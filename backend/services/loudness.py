@@ -0,0 +1,165 @@
+"""
+NAVO RADIO — индекс громкости.
+Фоновый анализатор один раз меряет интегральную громкость (LUFS) и true peak каждого файла
+(FFmpeg ebur128) и хранит результат в CACHE_DIR/loudness.json.
+Feeder умножает куски PCM на готовый коэффициент — без loudnorm на каждом проигрывании.
+"""
+import json
+import queue
+import re
+import subprocess
+import threading
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from config import CACHE_DIR, LOUDNESS_ENABLED, LOUDNESS_MAX_GAIN_DB, LOUDNESS_TARGET_LUFS, LOUDNESS_TRUE_PEAK
+
+from .cache_manager import atomic_write
+from .pcm_cache import BYTES_PER_SECOND, cache_key, ffmpeg_exe
+
+INDEX_PATH = CACHE_DIR / "loudness.json"
+# Тише этого — тишина/пустой файл, усиливать нечего
+_SILENT_LUFS = -60.0
+_ANALYZE_TIMEOUT = 300
+
+_I_RE = re.compile(r"I:\s+(-?[\d.]+|-inf) LUFS")
+_PEAK_RE = re.compile(r"Peak:\s+(-?[\d.]+|-inf) dBFS")
+
+_index: dict[str, dict[str, float]] | None = None
+_index_lock = threading.Lock()
+_jobs: queue.Queue[Path] = queue.Queue()
+_pending: set[str] = set()
+_thread: threading.Thread | None = None
+
+
+def _load_index() -> dict[str, dict[str, float]]:
+    global _index
+    if _index is None:
+        try:
+            _index = json.loads(INDEX_PATH.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            _index = {}
+    return _index
+
+
+def _save_index() -> None:
+    with atomic_write(INDEX_PATH) as tmp:
+        tmp.write_text(json.dumps(_index, ensure_ascii=False), encoding="utf-8")
+
+
+def measure(path: Path) -> dict[str, float] | None:
+    """Измерить громкость файла: {"lufs": ..., "peak": ...} или None."""
+    try:
+        result = subprocess.run(
+            [ffmpeg_exe(), "-hide_banner", "-nostats", "-i", str(path),
+             "-af", "ebur128=peak=true", "-f", "null", "-"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=_ANALYZE_TIMEOUT,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"[LOUDNESS] Ошибка анализа {path}: {e}")
+        return None
+    log = result.stderr.decode("utf-8", errors="replace")
+    # Итоговая сводка — в конце вывода
+    lufs = _I_RE.findall(log)
+    peak = _PEAK_RE.findall(log)
+    if result.returncode != 0 or not lufs:
+        print(f"[LOUDNESS] Не удалось измерить: {path}")
+        return None
+    return {
+        "lufs": float(lufs[-1]),
+        "peak": float(peak[-1]) if peak else 0.0,
+    }
+
+
+def _worker() -> None:
+    while True:
+        path = _jobs.get()
+        try:
+            key = cache_key(path)
+            stats = measure(path)
+            if stats:
+                with _index_lock:
+                    _load_index()[key] = stats
+                    _save_index()
+        except Exception as e:
+            print(f"[LOUDNESS] Ошибка {path}: {e}")
+        finally:
+            with _index_lock:
+                _pending.discard(str(path))
+
+
+def analyze_async(path: Path) -> None:
+    """Поставить файл на анализ в фоне, если его ещё нет в индексе."""
+    global _thread
+    if not LOUDNESS_ENABLED:
+        return
+    try:
+        key = cache_key(path)
+    except OSError:
+        return
+    with _index_lock:
+        if key in _load_index() or str(path) in _pending:
+            return
+        _pending.add(str(path))
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_worker, name="loudness", daemon=True)
+            _thread.start()
+    _jobs.put(path)
+
+
+def gain_for(path: Path) -> float:
+    """
+    Линейный коэффициент до LOUDNESS_TARGET_LUFS с ограничением по true peak.
+    1.0 — файл ещё не измерен (анализ поставлен в фон) или нормализация выключена.
+    """
+    if not LOUDNESS_ENABLED:
+        return 1.0
+    try:
+        key = cache_key(path)
+    except OSError:
+        return 1.0
+    with _index_lock:
+        stats = _load_index().get(key)
+    if stats is None:
+        analyze_async(path)
+        return 1.0
+    if stats["lufs"] <= _SILENT_LUFS:
+        return 1.0
+    gain_db = LOUDNESS_TARGET_LUFS - stats["lufs"]
+    gain_db = min(gain_db, LOUDNESS_MAX_GAIN_DB, LOUDNESS_TRUE_PEAK - stats["peak"])
+    return float(10 ** (gain_db / 20))
+
+
+def fade_out(chunks: Iterable[bytes], seconds: float) -> Iterator[bytes]:
+    """Первые seconds кусков PCM s16le с линейным затуханием до нуля; остаток не читается."""
+    import numpy as np
+
+    total = int(seconds * BYTES_PER_SECOND) // 2
+    done = 0
+    for chunk in chunks:
+        n = min(len(chunk) // 2, total - done)
+        if n <= 0:
+            return
+        samples = np.frombuffer(chunk, dtype=np.int16, count=n).astype(np.float32)
+        samples *= 1.0 - (np.arange(done, done + n, dtype=np.float32) / total)
+        done += n
+        yield samples.astype(np.int16).tobytes()
+
+
+def apply_gain(chunks: Iterable[bytes], gain: float) -> Iterator[bytes]:
+    """Умножить куски PCM s16le на gain (с насыщением)."""
+    if abs(gain - 1.0) < 1e-3:
+        yield from chunks
+        return
+    # numpy — только когда есть что масштабировать: не задерживает холодный старт
+    import numpy as np
+
+    for chunk in chunks:
+        samples = np.frombuffer(chunk, dtype=np.int16, count=len(chunk) // 2)
+        scaled = samples.astype(np.float32)
+        scaled *= gain
+        np.clip(scaled, -32768, 32767, out=scaled)
+        yield scaled.astype(np.int16).tobytes()
@@ -0,0 +1,93 @@
+"""
+NAVO RADIO — «сейчас в эфире».
+Обновляется feeder'ом в момент, когда элемент реально начинает звучать (по часам эфира,
+а не по постановке в очередь). Рассылка: ICY StreamTitle в Icecast и подписчики
+(SSE/JSON встроенного HTTP-сервера) — клиентам не нужно опрашивать.
+"""
+import queue
+import threading
+import time
+from collections.abc import Callable
+
+from config import ICECAST_HOST, ICECAST_PASSWORD, ICECAST_PORT
+
+from .downloader import get_session
+
+_ICY_TIMEOUT = 5
+
+_lock = threading.Lock()
+_now: dict = {"title": None, "started_at": None, "duration": 0.0, "next": []}
+_watchers: list[Callable[[dict], None]] = []
+# Для ICY важен только последний заголовок — старые выбрасываются
+_icy_queue: queue.Queue[str] = queue.Queue(maxsize=1)
+_icy_thread: threading.Thread | None = None
+_icy_mount_list: list[str] | None = None  # STREAM_OUTPUTS не меняется без перезапуска — разбираем один раз
+
+
+def now_playing() -> dict:
+    """Снимок: title, started_at (unix), elapsed, duration, next (названия в очереди)."""
+    with _lock:
+        snap = dict(_now)
+    started = snap["started_at"]
+    snap["elapsed"] = round(time.time() - started, 1) if started else 0.0
+    return snap
+
+
+def watch(callback: Callable[[dict], None]) -> None:
+    """Подписаться на смену элемента в эфире. callback вызывается из потока feeder'а — должен быть быстрым."""
+    with _lock:
+        _watchers.append(callback)
+
+
+def publish(title: str, duration: float, upcoming: list[str]) -> None:
+    """Элемент начал звучать (вызывает feeder)."""
+    with _lock:
+        _now.update(title=title, started_at=round(time.time(), 3), duration=round(duration, 1), next=upcoming)
+        watchers = list(_watchers)
+    snap = now_playing()
+    for callback in watchers:
+        try:
+            callback(snap)
+        except Exception as e:
+            print(f"[META] Ошибка подписчика: {e}")
+    _push_icy(title)
+
+
+def _push_icy(title: str) -> None:
+    global _icy_thread
+    if not ICECAST_PASSWORD:
+        return
+    try:
+        _icy_queue.get_nowait()
+    except queue.Empty:
+        pass
+    _icy_queue.put_nowait(title)
+    if _icy_thread is None or not _icy_thread.is_alive():
+        _icy_thread = threading.Thread(target=_icy_worker, name="icy-metadata", daemon=True)
+        _icy_thread.start()
+
+
+def _icy_mounts() -> list[str]:
+    """Icecast-mount'ы, понимающие ICY (MP3/AAC; Ogg передаёт теги внутри потока)."""
+    global _icy_mount_list
+    if _icy_mount_list is None:
+        from .encoder import parse_outputs
+
+        _icy_mount_list = [o.mount for o in parse_outputs() if o.target == "icecast" and o.codec != "opus"]
+    return _icy_mount_list
+
+
+def _icy_worker() -> None:
+    while True:
+        title = _icy_queue.get()
+        for mount in _icy_mounts():
+            try:
+                resp = get_session().get(
+                    f"http://{ICECAST_HOST}:{ICECAST_PORT}/admin/metadata",
+                    params={"mount": f"/{mount}", "mode": "updinfo", "song": title, "charset": "UTF-8"},
+                    auth=("source", ICECAST_PASSWORD),
+                    timeout=_ICY_TIMEOUT,
+                )
+                resp.raise_for_status()
+            except Exception as e:
+                print(f"[META] ICY /{mount}: {e}")
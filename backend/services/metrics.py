@@ -0,0 +1,167 @@
+"""
+NAVO RADIO — метрики эфира в формате Prometheus (text exposition 0.0.4).
+Без внешних зависимостей: счётчики и гистограммы обновляются на месте,
+значения, которые уже есть в модулях (очередь, часы эфира), снимаются в момент запроса /metrics.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+Labels = tuple[tuple[str, str], ...]
+
+# Границы гистограммы стадий подготовки, сек: от ответа кэша до долгой загрузки
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_metrics: list["_Metric"] = []
+_lock = threading.Lock()
+
+
+def _labels(kw: dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in kw.items()))
+
+
+def _fmt_labels(labels: Labels, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _Metric(ABC):
+    """Метрика в реестре /metrics: тип, описание и строки значений."""
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        with _lock:
+            _metrics.append(self)
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        """Строки значений в формате exposition (без # HELP / # TYPE)."""
+
+
+class Counter(_Metric):
+    """Монотонный счётчик с метками."""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = _labels(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with _lock:
+            values = dict(self._values)
+        for labels, v in values.items():
+            yield f"{self.name}{_fmt_labels(labels)} {_fmt_value(v)}"
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными границами."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...] = STAGE_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # метки → (счётчики по корзинам, сумма, число наблюдений)
+        self._values: dict[Labels, tuple[list[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _labels(labels)
+        with _lock:
+            counts, total, n = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, n + 1)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Замерить длительность блока (в том числе завершившегося исключением)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> Iterator[str]:
+        with _lock:
+            values = {k: (list(c), s, n) for k, (c, s, n) in self._values.items()}
+        for labels, (counts, total, n) in values.items():
+            for bound, c in zip(self.buckets, counts):
+                yield f"{self.name}_bucket{_fmt_labels(labels, (('le', _fmt_value(bound)),))} {c}"
+            yield f"{self.name}_sum{_fmt_labels(labels)} {_fmt_value(total)}"
+            yield f"{self.name}_count{_fmt_labels(labels)} {n}"
+
+
+class Collected(_Metric):
+    """Значения, снимаемые в момент запроса: fn → {метки: значение} или число."""
+
+    def __init__(
+        self, name: str, help_text: str, fn: Callable[[], dict[Labels, float] | float], kind: str = "gauge"
+    ):
+        super().__init__(name, help_text)
+        self.kind = kind
+        self._fn = fn
+
+    def samples(self) -> Iterator[str]:
+        try:
+            result = self._fn()
+        except Exception as e:
+            print(f"[METRICS] {self.name}: {e}")
+            return
+        if not isinstance(result, dict):
+            result = {(): result}
+        for labels, v in result.items():
+            yield f"{self.name}{_fmt_labels(labels)} {_fmt_value(v)}"
+
+
+def labels(**kw: str) -> Labels:
+    """Ключ меток для Collected-функций."""
+    return _labels(kw)
+
+
+def render() -> str:
+    """Все метрики в текстовом формате Prometheus."""
+    with _lock:
+        metrics = list(_metrics)
+    lines: list[str] = []
+    for m in metrics:
+        lines.append(f"# HELP {m.name} {m.help}")
+        lines.append(f"# TYPE {m.name} {m.kind}")
+        lines.extend(m.samples())
+    return "\n".join(lines) + "\n"
+
+
+# Общие метрики, которые пишут разные модули
+STAGE_SECONDS = Histogram(
+    "navo_stage_duration_seconds",
+    "Длительность стадий подготовки эфира (jamendo, download, groq, tts)",
+)
+CACHE_LOOKUPS = Counter(
+    "navo_cache_lookups_total",
+    "Обращения к кэшам (tts, groq, pcm, track) по результату hit/miss",
+)
+RESTARTS = Counter(
+    "navo_restarts_total",
+    "Перезапуски компонентов эфира (feeder)",
+)
@@ -0,0 +1,125 @@
+"""
+NAVO RADIO — микшер эфира.
+Необязательная ступень между декодером и stdin энкодера: кроссфейд между элементами очереди
+и voice-over (трек под голосом DJ-интро приглушён). Хвост уходящей части держится в памяти
+и смешивается с началом следующей векторно (numpy int16).
+"""
+import time
+from collections.abc import Iterable, Iterator
+
+import numpy as np
+
+from .pcm_cache import SAMPLE_RATE, SAMPLE_WIDTH
+
+# После конца голоса трек возвращается к полной громкости за это время
+DUCK_RELEASE_SECONDS = 0.5
+# Сколько подряд превышений бюджета CPU терпим, прежде чем перейти на простую склейку
+_MAX_OVER_BUDGET = 3
+
+
+class Mixer:
+    """
+    Склейка частей эфира (intro, track, silence) с перекрытием.
+    feed() отдаёт байты для энкодера, удерживая последние hold секунд части до следующей.
+    """
+
+    def __init__(
+        self,
+        crossfade_seconds: float,
+        voiceover_seconds: float,
+        duck_db: float,
+        budget_ms: float,
+    ):
+        self._crossfade = int(crossfade_seconds * SAMPLE_RATE)
+        self._voiceover = int(voiceover_seconds * SAMPLE_RATE)
+        self._release = int(DUCK_RELEASE_SECONDS * SAMPLE_RATE)
+        self._duck_gain = 10 ** (duck_db / 20)
+        self._hold = max(self._crossfade, self._voiceover) * SAMPLE_WIDTH
+        self._budget = budget_ms / 1000
+        self._over_budget = 0
+        self.enabled = self._hold > 0
+        self._tail = bytearray()  # удержанный конец предыдущей части
+        self._tail_role: str | None = None
+
+    def feed(self, role: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Пропустить часть через микшер. role: intro | track | silence."""
+        if not self.enabled:
+            yield from self.flush()
+            yield from chunks
+            return
+
+        it = iter(chunks)
+        prev_role = self._tail_role
+        voiceover = prev_role == "intro" and role == "track"
+        overlap = self._voiceover if voiceover else self._crossfade
+        head_len = (overlap + (self._release if voiceover else 0)) * SAMPLE_WIDTH
+
+        # Начало новой части — столько, сколько нужно для перекрытия
+        head = bytearray()
+        for chunk in it:
+            head += chunk
+            if len(head) >= head_len:
+                break
+
+        if self._tail and overlap:
+            yield from self._mix(head, overlap, voiceover)
+        else:
+            yield from self.flush()
+            self._tail = head
+
+        # Дальше — сквозная передача, удерживая последние hold байт
+        self._tail_role = role
+        for chunk in it:
+            self._tail += chunk
+            if len(self._tail) > self._hold:
+                cut = (len(self._tail) - self._hold) // SAMPLE_WIDTH * SAMPLE_WIDTH
+                yield bytes(self._tail[:cut])
+                del self._tail[:cut]
+
+    def flush(self) -> Iterator[bytes]:
+        """Отдать удержанный хвост как есть (очередь пуста — перекрывать не с чем)."""
+        if self._tail:
+            out = bytes(self._tail)
+            self._tail = bytearray()
+            yield out
+        self._tail_role = None
+
+    def _mix(self, head: bytearray, overlap: int, voiceover: bool) -> Iterator[bytes]:
+        started = time.perf_counter()
+        tail = np.frombuffer(bytes(self._tail), dtype=np.int16)
+        new = np.frombuffer(bytes(head[: len(head) // SAMPLE_WIDTH * SAMPLE_WIDTH]), dtype=np.int16)
+        k = min(len(tail), len(new), overlap)
+
+        out_tail = tail[: len(tail) - k]
+        a = tail[len(tail) - k:].astype(np.float32)
+        b = new[:k].astype(np.float32)
+        rest = new[k:].astype(np.float32)
+        if voiceover:
+            # Голос на полной громкости, трек под ним приглушён, затем плавно возвращается
+            mixed = a + b * self._duck_gain
+            r = min(len(rest), self._release)
+            if r:
+                rest[:r] *= np.linspace(self._duck_gain, 1.0, r, dtype=np.float32)
+        else:
+            # Равномощный кроссфейд
+            t = np.linspace(0.0, np.pi / 2, k, dtype=np.float32)
+            mixed = a * np.cos(t) + b * np.sin(t)
+
+        self._tail = bytearray(np.clip(rest, -32768, 32767).astype(np.int16).tobytes())
+        self._check_budget(time.perf_counter() - started)
+
+        if len(out_tail):
+            yield out_tail.tobytes()
+        if k:
+            yield np.clip(mixed, -32768, 32767).astype(np.int16).tobytes()
+
+    def _check_budget(self, elapsed: float) -> None:
+        """Смешивание должно укладываться в бюджет — иначе эфир важнее красоты склейки."""
+        if elapsed <= self._budget:
+            self._over_budget = 0
+            return
+        self._over_budget += 1
+        print(f"[MIXER] Смешивание {elapsed * 1000:.1f} мс — больше бюджета {self._budget * 1000:.0f} мс")
+        if self._over_budget >= _MAX_OVER_BUDGET:
+            print("[MIXER] Бюджет CPU превышен несколько раз подряд — переход на простую склейку")
+            self.enabled = False
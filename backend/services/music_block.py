@@ -1,140 +1,210 @@
 """
 NAVO RADIO — музыкальный блок.
 Оркестрация: Jamendo → Groq → TTS → Stream.
-Предзагрузка следующего трека — минимум паузы между треками.
+Конвейер подготовки держит PREP_DEPTH треков в работе: интро и загрузка идут параллельно,
+готовые треки ждут в очереди — минимум паузы между треками даже после сбоя бэкенда.
 """
+import queue
 import threading
 import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 from pathlib import Path
-from config import CACHE_DIR
 
-from config import FFMPEG_PATH
+from config import GROQ_INTRO_BATCH, PREP_DEPTH, PREP_WORKERS, TTS_TIMEOUT
 
-from .groq_client import generate_dj_intro
-from .jamendo import download_track, get_next_track
+from .cache_manager import pin, unpin
+from .groq_client import generate_dj_intro, generate_dj_intros
+from .jamendo import Track, cache_path, download_track, get_next_track
+from .metrics import STAGE_SECONDS
 from .streamer import enqueue_track, start_continuous_stream, stream_to_icecast
-from .tts import text_to_speech
+from .tts import submit_tts, text_to_speech
 
-# Предзагруженные данные для следующего трека (фоновый поток)
-_next_track_data: tuple[Path | None, Path, str] | None = None
-_next_lock = threading.Lock()
+# Пауза перед повторной попыткой, если подготовка не удалась (API недоступен и т.п.)
+_RETRY_DELAY = 5
 
+# Готовые треки: (intro_path, track_path, display_name)
+_ready: queue.Queue[tuple[Path | None, Path, str]] = queue.Queue()
+_in_flight = 0
+_pipeline_lock = threading.Lock()
+# Подписка «готовый трек появился» — главный поток не ждёт конвейер, а спит до сигнала
+_on_ready: Callable[[], None] | None = None
+# Координаторы (по одному на готовящийся трек) и стадии (интро, загрузка) — раздельно,
+# чтобы координатор, ждущий стадию, не занимал её поток
+_prep_pool = ThreadPoolExecutor(max_workers=PREP_DEPTH, thread_name_prefix="prep")
+_stage_pool = ThreadPoolExecutor(max_workers=PREP_WORKERS, thread_name_prefix="prep-stage")
+
+# Уже выбранные треки, интро для которых получены пачкой (лежат в кэше ответов Groq)
+_lookahead: deque[Track] = deque()
+_lookahead_lock = threading.Lock()
 
-def _prepare_track_data() -> tuple[Path | None, Path, str] | None:
-    """Подготовить intro + track. Возвращает (intro_path, track_path, display_name) или None."""
-    try:
-        track = get_next_track()
-    except Exception as e:
-        print(f"[MUSIC] Jamendo ошибка: {e}")
-        return None
-    if not track:
-        return None
 
-    intro_path = None
+def _next_track() -> Track | None:
+    """
+    Следующий трек. Когда запас кончился — выбрать GROQ_INTRO_BATCH треков
+    и получить интро для всех одним запросом к Groq, озвучка — сразу для всей пачки.
+    """
+    with _lookahead_lock:
+        if not _lookahead:
+            tracks: list[Track] = []
+            for _ in range(max(1, GROQ_INTRO_BATCH)):
+                try:
+                    with STAGE_SECONDS.time(stage="jamendo"):
+                        track = get_next_track()
+                except Exception:
+                    if not tracks:
+                        raise
+                    break
+                if track is None:
+                    break
+                tracks.append(track)
+            if len(tracks) > 1:
+                # Озвучка всей пачки сразу и параллельно; подготовка трека подхватит идущий синтез
+                for text in generate_dj_intros(tracks).values():
+                    submit_tts(text)
+            _lookahead.extend(tracks)
+        return _lookahead.popleft() if _lookahead else None
+
+
+def _make_intro(track: Track) -> Path | None:
+    """Groq → TTS. При ошибке — шаблонная фраза, при повторной ошибке — без интро."""
     try:
         text = generate_dj_intro(
             track_name=track.name,
             artist_name=track.artist_name,
             album_name=track.album_name,
+            track_id=track.id,
         )
-        intro_path = text_to_speech(text, filename=f"intro_{track.id}.mp3")
+        return text_to_speech(text)
+    except TimeoutError:
+        # Повторный синтез ждал бы столько же — сразу без интро
+        print(f"[MUSIC] TTS не успел за {TTS_TIMEOUT:.0f} с, без интро")
+        return None
     except Exception as e:
         print(f"[MUSIC] TTS/Groq ошибка, без интро: {e}")
         try:
             fallback = f"Сейчас в эфире — {track.artist_name} с композицией {track.name}."
-            intro_path = text_to_speech(fallback, filename=f"intro_fb_{track.id}.mp3")
+            return text_to_speech(fallback)
         except Exception:
-            pass
+            return None
+
 
+def _prepare_track_data() -> tuple[Path | None, Path, str] | None:
+    """Подготовить intro + track. Возвращает (intro_path, track_path, display_name) или None."""
     try:
-        track_path = download_track(track)
+        track = _next_track()
+    except Exception as e:
+        print(f"[MUSIC] Jamendo ошибка: {e}")
+        return None
+    if not track:
+        return None
+
+    # Трек закреплён ещё до загрузки: докачиваемый .part (atime — с прошлого запуска)
+    # не вытеснится, пока качается, а готовый файл — пока ждёт эфира
+    pin(cache_path(track))
+    # Интро синтезируется, пока трек скачивается
+    intro_future = _stage_pool.submit(_make_intro, track)
+    download_future = _stage_pool.submit(download_track, track)
+    try:
+        intro_path = intro_future.result(timeout=TTS_TIMEOUT)
+    except TimeoutError:
+        # Зависший Groq/TTS не держит слот PREP_DEPTH: трек уходит без интро
+        intro_future.cancel()
+        print(f"[MUSIC] Интро не готово за {TTS_TIMEOUT:.0f} с, трек без интро")
+        intro_path = None
+    try:
+        track_path = download_future.result()
     except Exception as e:
         print(f"[MUSIC] Ошибка загрузки трека: {e}")
+        unpin(cache_path(track))
         return None
 
+    # Готовое интро тоже ждёт эфира — не вытеснять до постановки в очередь
+    pin(intro_path)
     return (intro_path, track_path, f"{track.artist_name} — {track.name}")
 
 
-def _ensure_silence_file() -> Path:
-    """Создать 8 сек тишины для fallback при сбоях."""
-    silence_path = CACHE_DIR / "silence_8s.mp3"
-    if silence_path.exists():
-        return silence_path
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    ffmpeg = FFMPEG_PATH if FFMPEG_PATH else "ffmpeg"
-    import subprocess
-    subprocess.run(
-        [ffmpeg, "-y", "-f", "lavfi", "-i", "anullsrc=r=44100:cl=mono", "-t", "8",
-         "-q:a", "9", "-acodec", "libmp3lame", str(silence_path)],
-        capture_output=True,
-        timeout=15,
-    )
-    return silence_path
-
-
-def _prepare_next_async() -> None:
-    """В фоне подготовить следующий трек."""
-    global _next_track_data
+def _prepare_one() -> None:
+    """Подготовить один трек в очередь готовых; слот конвейера освобождается в конце."""
+    global _in_flight
     try:
         data = _prepare_track_data()
-        with _next_lock:
-            _next_track_data = data
+        if data is not None:
+            _ready.put(data)
+            _notify_ready()
+        else:
+            time.sleep(_RETRY_DELAY)
     except Exception as e:
-        print(f"[MUSIC] Предзагрузка не удалась: {e}")
-        with _next_lock:
-            _next_track_data = None
+        print(f"[MUSIC] Подготовка не удалась: {e}")
+        time.sleep(_RETRY_DELAY)
+    finally:
+        with _pipeline_lock:
+            _in_flight -= 1
+    _fill_pipeline()
 
 
-def run_music_track(intro_enabled: bool = True) -> bool:
+def _fill_pipeline() -> None:
+    """Держать PREP_DEPTH треков готовыми или в подготовке."""
+    global _in_flight
+    with _pipeline_lock:
+        need = PREP_DEPTH - _in_flight - _ready.qsize()
+        for _ in range(max(0, need)):
+            _in_flight += 1
+            _prep_pool.submit(_prepare_one)
+
+
+def _notify_ready() -> None:
+    global _on_ready
+    with _pipeline_lock:
+        callback, _on_ready = _on_ready, None
+    if callback is not None:
+        callback()
+
+
+def on_track_ready(callback: Callable[[], None]) -> None:
     """
-    Воспроизвести один трек с DJ-интро.
-    Использует предзагруженные данные, если есть — минимум паузы.
+    Однократно вызвать callback (из потока подготовки), когда готовый трек появится.
+    Заменяет предыдущую подписку; трек уже готов — вызывается сразу.
     """
-    global _next_track_data
+    global _on_ready
+    with _pipeline_lock:
+        _on_ready = callback
+    if not _ready.empty():
+        _notify_ready()
 
-    with _next_lock:
-        data = _next_track_data
-        _next_track_data = None
 
-    if data is None:
-        data = _prepare_track_data()
-        if data is None:
-            # Fallback: стримим тишину, пока готовим трек
-            t = threading.Thread(target=_prepare_next_async, daemon=True)
-            t.start()
-            for _ in range(4):
-                time.sleep(2)
-                silence = _ensure_silence_file()
-                if silence.exists():
-                    if start_continuous_stream() and enqueue_track(None, silence):
-                        pass  # тишина в очереди
-                    else:
-                        for _r in range(3):
-                            proc = stream_to_icecast(None, silence)
-                            if proc:
-                                proc.wait()
-                                if getattr(proc, "returncode", 0) == 0:
-                                    break
-                            time.sleep(4)
-                with _next_lock:
-                    data = _next_track_data
-                    _next_track_data = None
-                if data is not None:
-                    break
-            if data is None:
-                return False
+def start_prep() -> None:
+    """Начать подготовку треков в фоне — при старте, пока звучит заставка."""
+    _fill_pipeline()
+
+
+def run_music_track(intro_enabled: bool = True) -> bool:
+    """
+    Воспроизвести один трек с DJ-интро.
+    Берёт готовый трек из конвейера, не дожидаясь его: нет готового — False сразу
+    (паузу заполняет резерв feeder'а, о готовности сообщит on_track_ready).
+    """
+    _fill_pipeline()
+    try:
+        data = _ready.get_nowait()
+    except queue.Empty:
+        return False
+    _fill_pipeline()
 
     intro_path, track_path, display_name = data
+    if not intro_enabled:
+        intro_path = None
     safe_name = display_name.encode("ascii", errors="replace").decode("ascii")
     print(f"[MUSIC] {safe_name}")
 
-    # Запускаем предзагрузку следующего в фоне
-    t = threading.Thread(target=_prepare_next_async, daemon=True)
-    t.start()
-
-    # Непрерывный стрим: один FFmpeg, очередь треков — без 409 и пауз
-    if start_continuous_stream() and enqueue_track(intro_path, track_path):
-        return True
+    # Непрерывный стрим: один FFmpeg, очередь треков — без 409 и пауз.
+    # В очереди файлы закрепляет сам элемент — закрепление конвейера снимаем
+    try:
+        if start_continuous_stream() and enqueue_track(intro_path, track_path, title=display_name):
+            return True
+    finally:
+        unpin(data[0], track_path)
 
     # Fallback: отдельный FFmpeg на трек (пауза 2 сек, retry при 409)
     time.sleep(2)
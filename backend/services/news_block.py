@@ -1,11 +1,13 @@
 """
 NAVO RADIO — блок новостей.
 RSS ASIA-Plus (Таджикистан) → Groq → TTS → эфир.
+Лента не изменилась с прошлого выпуска — тот же сценарий и то же аудио из кэша TTS.
 """
-import feedparser
-import requests
+from pathlib import Path
 
-from .groq_client import generate_news_script
+from .groq_client import NEWS_UNAVAILABLE, generate_news_script
+from .ingest import fetch, normalize, script_for
+from .live_speech import speak
 from .streamer import enqueue_track, start_continuous_stream
 from .tts import text_to_speech
 
@@ -13,37 +15,60 @@ from .tts import text_to_speech
 RSS_URL = "https://asiaplustj.info/en/rss"
 
 
-def _fetch_news_text() -> str:
-    """Получить текст новостей из RSS."""
-    try:
-        resp = requests.get(RSS_URL, timeout=15)
-        resp.raise_for_status()
-        feed = feedparser.parse(resp.content)
-        items = feed.get("entries", [])[:5]
-        texts = []
-        for item in items:
-            title = item.get("title", "")
-            summary = item.get("summary", item.get("description", ""))
-            if title or summary:
-                texts.append(f"{title}. {summary[:500]}")
-        return "\n\n".join(texts) if texts else ""
-    except Exception as e:
-        print(f"[NEWS] RSS ошибка: {e}")
-        return ""
+def _parse_feed(resp) -> str:
+    """Разобрать RSS: пять верхних записей; запись, повторённая в ленте (тот же GUID), — один раз."""
+    # feedparser нужен раз в несколько часов — не импортируем его при старте
+    import feedparser
+
+    feed = feedparser.parse(resp.content)
+    seen: set[str] = set()
+    texts = []
+    for item in feed.get("entries", []):
+        guid = item.get("id") or item.get("link") or item.get("title", "")
+        if not guid or guid in seen:
+            continue
+        seen.add(guid)
+        title = normalize(item.get("title", ""))
+        summary = normalize(item.get("summary", item.get("description", "")))
+        if title or summary:
+            texts.append(f"{title}. {summary[:500]}")
+        if len(texts) == 5:
+            break
+    return "\n\n".join(texts)
+
+
+def fetch_news_text() -> str:
+    """Получить текст новостей из RSS (условный запрос: лента не менялась — прошлый текст)."""
+    return fetch("news", RSS_URL, _parse_feed, timeout=15)
 
 
-def run_news_block() -> bool:
-    """Выпуск новостей. Возвращает True если успешно."""
-    news_text = _fetch_news_text()
-    script = generate_news_script(news_text)
+def news_script() -> str:
+    """Сценарий выпуска: лента по существу не изменилась — прежний сценарий, без Groq."""
+    return script_for("news", fetch_news_text(), generate_news_script, NEWS_UNAVAILABLE)
+
+
+def render_news_block() -> Path | None:
+    """Подготовить выпуск новостей (RSS → Groq → TTS), не ставя в эфир."""
+    script = news_script()
 
     try:
-        path = text_to_speech(script, filename="news_latest.mp3")
+        return text_to_speech(script)
     except Exception as e:
         print(f"[NEWS] TTS ошибка: {e}")
+        return None
+
+
+def run_news_block(path: Path | None = None) -> bool:
+    """Выпуск новостей. path — заранее подготовленный выпуск. Возвращает True если успешно."""
+    if path is None:
+        # Готового файла нет — речь идёт в эфир по мере синтеза
+        script = news_script()
+        if speak(script, name="news", title="Новости", priority=True):
+            print("[NEWS] Выпуск новостей (потоково)")
+            return True
         return False
 
-    if start_continuous_stream() and enqueue_track(None, path):
+    if start_continuous_stream() and enqueue_track(None, path, title="Новости", priority=True):
         print("[NEWS] Выпуск новостей")
         return True
     return False
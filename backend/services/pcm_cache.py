@@ -0,0 +1,159 @@
+"""
+NAVO RADIO — кэш PCM.
+Каждый файл декодируется один раз в s16le/44100/mono и хранится в CACHE_DIR — и для треков,
+и для заставок/подкастов из других каталогов: PCM учитывается в бюджете CACHE_MAX_MB.
+Ключ — хэш содержимого файла и аргументов FFmpeg; feeder читает PCM через mmap.
+"""
+import hashlib
+import mmap
+import os
+import subprocess
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+from config import CACHE_DIR, FFMPEG_PATH
+
+from .cache_manager import commit_file, temp_path
+from .metrics import CACHE_LOOKUPS
+
+SAMPLE_RATE = 44100
+CHANNELS = 1
+SAMPLE_WIDTH = 2  # s16le
+BYTES_PER_SECOND = SAMPLE_RATE * CHANNELS * SAMPLE_WIDTH
+CHUNK_SIZE = 65536
+
+# Аргументы декодирования — входят в ключ кэша: сменились аргументы → новый PCM
+INPUT_ARGS = ("-fflags", "+genpts+discardcorrupt", "-err_detect", "ignore_err")
+OUTPUT_ARGS = ("-c:a", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-ac", str(CHANNELS), "-f", "s16le")
+
+DECODE_TIMEOUT = 300
+
+# (путь, размер, mtime) → ключ, чтобы не хэшировать файл при каждом проигрывании.
+# Не больше _KEY_MEMO_MAX записей: сверх — забывается самая старая
+_KEY_MEMO_MAX = 1024
+_key_memo: dict[tuple[str, int, int], str] = {}
+_locks: dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def ffmpeg_exe() -> str:
+    return FFMPEG_PATH if FFMPEG_PATH else "ffmpeg"
+
+
+def decode_cmd(path: Path | str, output: str = "-") -> list[str]:
+    """Команда FFmpeg: файл → сырой PCM."""
+    return [
+        ffmpeg_exe(),
+        "-y", "-loglevel", "error",
+        *INPUT_ARGS,
+        "-i", str(path),
+        *OUTPUT_ARGS,
+        output,
+    ]
+
+
+def cache_key(path: Path) -> str:
+    """Ключ кэша: sha1(содержимое файла + аргументы декодирования)."""
+    st = path.stat()
+    memo_key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+    with _locks_guard:
+        key = _key_memo.get(memo_key)
+    if key:
+        return key
+    h = hashlib.sha1()
+    h.update(" ".join(INPUT_ARGS + OUTPUT_ARGS).encode("utf-8"))
+    with open(path, "rb") as f:
+        while block := f.read(1 << 20):
+            h.update(block)
+    key = h.hexdigest()[:16]
+    with _locks_guard:
+        if len(_key_memo) >= _KEY_MEMO_MAX:
+            _key_memo.pop(next(iter(_key_memo)))
+        _key_memo[memo_key] = key
+    return key
+
+
+def pcm_path_for(path: Path) -> Path:
+    """
+    Путь к PCM в CACHE_DIR: track_1.mp3 → track_1.<ключ>.pcm.
+    Имя начинается с имени источника — PCM в одной группе с ним (pin, вытеснение вместе).
+    """
+    return CACHE_DIR / f"{path.stem}.{cache_key(path)}.pcm"
+
+
+def _lock_for(key: str) -> threading.Lock:
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = threading.Lock()
+        return lock
+
+
+def ensure_pcm(path: Path) -> Path | None:
+    """
+    Вернуть путь к декодированному PCM, при необходимости декодировать один раз.
+    None — файл не декодируется или каталог недоступен на запись.
+    """
+    try:
+        pcm = pcm_path_for(path)
+    except OSError as e:
+        print(f"[PCM] Нет доступа к {path}: {e}")
+        return None
+
+    with _lock_for(str(pcm)):
+        if pcm.exists():
+            CACHE_LOOKUPS.inc(cache="pcm", result="hit")
+            return pcm
+        CACHE_LOOKUPS.inc(cache="pcm", result="miss")
+        # Уникальное временное имя и commit_file: параллельные декодеры не мешают друг другу,
+        # готовый PCM сразу учтён в бюджете кэша
+        tmp = temp_path(pcm)
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            result = subprocess.run(
+                decode_cmd(path, str(tmp)),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=DECODE_TIMEOUT,
+            )
+            if result.returncode != 0 or not tmp.exists():
+                print(f"[PCM] Не удалось декодировать: {path}")
+                tmp.unlink(missing_ok=True)
+                return None
+            commit_file(tmp, pcm)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"[PCM] Ошибка декодирования {path}: {e}")
+            tmp.unlink(missing_ok=True)
+            return None
+        # PCM прежней версии файла (другой ключ) не ищем: он больше не читается и уйдёт по бюджету
+        return pcm
+
+
+def iter_pcm(pcm: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Читать PCM из memory-mapped файла кусками."""
+    with open(pcm, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset in range(0, size, chunk_size):
+                yield mm[offset:offset + chunk_size]
+
+
+def iter_decode(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Декодировать на лету без кэша (каталог только для чтения и т.п.)."""
+    proc = subprocess.Popen(
+        decode_cmd(path),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        assert proc.stdout is not None
+        while chunk := proc.stdout.read(chunk_size):
+            yield chunk
+    finally:
+        proc.kill()
+        proc.wait()
@@ -9,14 +9,17 @@ from config import PODCASTS_DIR
 from .streamer import enqueue_track, start_continuous_stream
 
 
-def run_podcast_block(filename: str) -> bool:
-    """Проиграть подкаст. Возвращает True если успешно."""
-    path = PODCASTS_DIR / filename
+def run_podcast_block(filename: str, path: Path | None = None) -> bool:
+    """
+    Проиграть подкаст. path — подкаст, заранее декодированный планировщиком (PCM уже в кэше).
+    Возвращает True если успешно.
+    """
+    path = path or PODCASTS_DIR / filename
     if not path.exists():
         print(f"[PODCAST] Файл не найден: {path}")
         return False
 
-    if start_continuous_stream() and enqueue_track(None, path):
+    if start_continuous_stream() and enqueue_track(None, path, title=f"Подкаст — {path.stem}", priority=True):
         print(f"[PODCAST] {filename}")
         return True
     return False
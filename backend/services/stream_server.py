@@ -0,0 +1,335 @@
+"""
+NAVO RADIO — встроенный HTTP-сервер потока (asyncio).
+Замена Icecast для локального запуска и тестов: энкодер пишет закодированный поток в кольцевой буфер
+mount'а, слушатели получают срезы буфера без копирования. Новый слушатель сразу получает
+несколько секунд из буфера (быстрый старт); отставший дальше буфера или не принимающий данные — отключается.
+Там же «сейчас в эфире»: /nowplaying.json и поток событий /nowplaying/events (SSE), метрики — /metrics.
+"""
+import asyncio
+import json
+import threading
+
+from config import (
+    STREAM_SERVER_BUFFER_SECONDS,
+    STREAM_SERVER_BURST_SECONDS,
+    STREAM_SERVER_HOST,
+    STREAM_SERVER_PORT,
+)
+
+from .metadata import now_playing, watch
+from .metrics import Collected, labels, render
+
+_HEADER_TIMEOUT = 10.0
+# Клиент не принял данные за это время — медленный, отключаем
+_DRAIN_TIMEOUT = 10.0
+_WRITE_HIGH_WATER = 256 * 1024
+_MIN_CAPACITY = 64 * 1024
+_OGG_HEADER_PAGES = 2  # Opus: ID header + comment header
+NOWPLAYING_JSON = "nowplaying.json"
+NOWPLAYING_EVENTS = "nowplaying/events"
+METRICS_PATH = "metrics"
+# Пустой комментарий SSE — прокси не закрывают молчащее соединение
+_SSE_PING = 15.0
+
+
+def _ogg_page_size(data: bytes | bytearray, offset: int) -> int | None:
+    """Длина страницы Ogg с offset или None, если страница ещё не пришла целиком."""
+    if len(data) < offset + 27:
+        return None
+    segments = data[offset + 26]
+    if len(data) < offset + 27 + segments:
+        return None
+    size = 27 + segments + sum(data[offset + 27:offset + 27 + segments])
+    return size if len(data) >= offset + size else None
+
+
+class Mount:
+    """Кольцевой буфер закодированного потока одного mount'а. Пишет поток энкодера, читает event loop."""
+
+    def __init__(self, name: str, content_type: str, bitrate_kbps: int):
+        self.name = name
+        self.content_type = content_type
+        rate = bitrate_kbps * 1000 // 8
+        self.capacity = max(_MIN_CAPACITY, int(rate * STREAM_SERVER_BUFFER_SECONDS))
+        self.burst = min(self.capacity // 2, int(rate * STREAM_SERVER_BURST_SECONDS))
+        self.head = 0  # всего записано байт — абсолютная позиция конца потока
+        # Заголовки Ogg отдаются каждому слушателю перед данными из середины потока
+        self.headers = b""
+        self._run_start = 0  # позиция начала текущего запуска энкодера — с неё идут заголовки Ogg
+        self.listeners = 0
+        self._buf = bytearray(self.capacity)
+        self._pending = bytearray()
+        self._lock = threading.Lock()
+        self._event = asyncio.Event()
+
+    @property
+    def is_ogg(self) -> bool:
+        return self.content_type == "audio/ogg"
+
+    def reset(self) -> None:
+        """Энкодер перезапущен: поток начинается заново (новые заголовки Ogg)."""
+        with self._lock:
+            self.headers = b""
+            self._pending = bytearray()
+            self._run_start = self.head
+
+    def write(self, data: bytes) -> None:
+        """Дописать кусок потока (из потока энкодера)."""
+        with self._lock:
+            if self.is_ogg and not self.headers:
+                self._capture_headers(data)
+            n = len(data)
+            if n > self.capacity:
+                self.head += n - self.capacity
+                data = data[-self.capacity:]
+                n = self.capacity
+            pos = self.head % self.capacity
+            first = min(n, self.capacity - pos)
+            self._buf[pos:pos + first] = data[:first]
+            self._buf[:n - first] = data[first:]
+            self.head += n
+        if _loop is not None:
+            _loop.call_soon_threadsafe(self._wake)
+
+    def _capture_headers(self, data: bytes) -> None:
+        self._pending += data
+        offset = 0
+        for _ in range(_OGG_HEADER_PAGES):
+            size = _ogg_page_size(self._pending, offset)
+            if size is None:
+                return
+            offset += size
+        self.headers = bytes(self._pending[:offset])
+        self._pending = bytearray()
+
+    def _wake(self) -> None:
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    async def wait(self, pos: int) -> None:
+        """Ждать, пока поток уйдёт дальше pos."""
+        while self.head <= pos:
+            await self._event.wait()
+
+    def valid(self, pos: int) -> bool:
+        """pos ещё в буфере (не перезаписан)."""
+        return pos >= self.head - self.capacity
+
+    def read(self, pos: int) -> memoryview | None:
+        """Данные с pos до конца потока (до границы кольца) без копирования. None — pos уже перезаписан."""
+        with self._lock:
+            if not self.valid(pos):
+                return None
+            start = pos % self.capacity
+            end = min(self.capacity, start + self.head - pos)
+            return memoryview(self._buf)[start:end]
+
+    def start_position(self) -> int:
+        """Откуда начать нового слушателя: burst байт назад (для Ogg — с начала страницы)."""
+        with self._lock:
+            pos = max(0, self.head - self.burst, self.head - self.capacity)
+            if not self.is_ogg:
+                return pos
+            # Заголовки слушатель получает отдельно — второй раз их не отдавать
+            pos = max(pos, self._run_start + len(self.headers))
+            if pos >= self.head:
+                return pos
+            window = bytearray()
+            p = pos
+            while p < self.head:
+                start = p % self.capacity
+                end = min(self.capacity, start + self.head - p)
+                window += self._buf[start:end]
+                p += end - start
+            found = window.find(b"OggS")
+            return pos + found if found >= 0 else self.head
+
+
+_mounts: dict[str, Mount] = {}
+_mounts_lock = threading.Lock()
+_loop: asyncio.AbstractEventLoop | None = None
+_thread: threading.Thread | None = None
+# Будит подписчиков SSE при смене элемента в эфире (заменяется на новый после срабатывания)
+_meta_event = asyncio.Event()
+
+
+def get_mount(name: str, content_type: str, bitrate_kbps: int) -> Mount:
+    """Mount для выхода энкодера (создаётся при первом обращении)."""
+    with _mounts_lock:
+        mount = _mounts.get(name)
+        if mount is None:
+            mount = _mounts[name] = Mount(name, content_type, bitrate_kbps)
+        return mount
+
+
+def get_listener_counts() -> dict[str, int]:
+    """Слушатели по mount'ам."""
+    with _mounts_lock:
+        return {name: m.listeners for name, m in _mounts.items()}
+
+
+Collected(
+    "navo_stream_listeners",
+    "Слушатели встроенного сервера по mount'ам",
+    lambda: {labels(mount=name): n for name, n in get_listener_counts().items()},
+)
+
+
+async def _respond(writer: asyncio.StreamWriter, status: str) -> None:
+    writer.write(f"HTTP/1.0 {status}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+
+
+def _headers(content_type: str, *extra: str) -> bytes:
+    lines = [
+        "HTTP/1.0 200 OK",
+        f"Content-Type: {content_type}",
+        "Cache-Control: no-cache, no-store",
+        "Access-Control-Allow-Origin: *",
+        *extra,
+    ]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def _on_metadata(_snapshot: dict) -> None:
+    """Смена элемента в эфире (поток feeder'а) → разбудить SSE-клиентов в event loop."""
+    if _loop is not None:
+        _loop.call_soon_threadsafe(_wake_metadata)
+
+
+def _wake_metadata() -> None:
+    global _meta_event
+    event, _meta_event = _meta_event, asyncio.Event()
+    event.set()
+
+
+def _nowplaying_body() -> bytes:
+    return json.dumps(now_playing(), ensure_ascii=False).encode("utf-8")
+
+
+async def _serve_events(writer: asyncio.StreamWriter) -> None:
+    """SSE: текущий элемент сразу, дальше — при каждой смене."""
+    while True:
+        event = _meta_event
+        writer.write(b"data: " + _nowplaying_body() + b"\n\n")
+        while True:
+            await asyncio.wait_for(writer.drain(), _DRAIN_TIMEOUT)
+            try:
+                await asyncio.wait_for(event.wait(), _SSE_PING)
+                break
+            except asyncio.TimeoutError:
+                writer.write(b": ping\n\n")
+
+
+async def _serve(mount: Mount, writer: asyncio.StreamWriter) -> None:
+    """Отдавать поток слушателю, пока он успевает."""
+    if mount.headers:
+        writer.write(mount.headers)
+    pos = mount.start_position()
+    while True:
+        await mount.wait(pos)
+        view = mount.read(pos)
+        if view is None:
+            print(f"[STREAM-SERVER] /{mount.name}: слушатель отстал больше буфера, отключён")
+            return
+        # Копия: с Python 3.12 транспорт держит неотправленное как срез переданного буфера,
+        # а кольцо энкодер перезаписывает — слушатель получил бы чужие байты
+        data = bytes(view)
+        view.release()
+        if not mount.valid(pos):
+            # Энкодер успел перезаписать срез во время копирования
+            print(f"[STREAM-SERVER] /{mount.name}: слушатель отстал больше буфера, отключён")
+            return
+        writer.write(data)
+        pos += len(data)
+        try:
+            await asyncio.wait_for(writer.drain(), _DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"[STREAM-SERVER] /{mount.name}: медленный слушатель отключён")
+            return
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), _HEADER_TIMEOUT)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            return
+        parts = request.split(b"\r\n", 1)[0].decode("latin-1").split()
+        if len(parts) < 2 or parts[0] not in ("GET", "HEAD"):
+            await _respond(writer, "405 Method Not Allowed")
+            return
+        name = parts[1].split("?", 1)[0].strip("/")
+        if name == NOWPLAYING_JSON:
+            body = _nowplaying_body()
+            writer.write(_headers("application/json; charset=utf-8", f"Content-Length: {len(body)}"))
+            if parts[0] == "GET":
+                writer.write(body)
+            await writer.drain()
+            return
+        if name == METRICS_PATH:
+            body = render().encode("utf-8")
+            writer.write(_headers("text/plain; version=0.0.4; charset=utf-8", f"Content-Length: {len(body)}"))
+            if parts[0] == "GET":
+                writer.write(body)
+            await writer.drain()
+            return
+        if name == NOWPLAYING_EVENTS:
+            writer.write(_headers("text/event-stream; charset=utf-8"))
+            if parts[0] == "GET":
+                await _serve_events(writer)
+            return
+        with _mounts_lock:
+            mount = _mounts.get(name)
+        if mount is None:
+            await _respond(writer, "404 Not Found")
+            return
+
+        writer.transport.set_write_buffer_limits(high=_WRITE_HIGH_WATER)
+        writer.write(_headers(mount.content_type, "icy-name: NAVO RADIO"))
+        if parts[0] == "HEAD":
+            await writer.drain()
+            return
+        mount.listeners += 1
+        try:
+            await _serve(mount, writer)
+        finally:
+            mount.listeners -= 1
+    except (ConnectionError, OSError, asyncio.TimeoutError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _main(ready: threading.Event) -> None:
+    server = await asyncio.start_server(_handle, STREAM_SERVER_HOST, STREAM_SERVER_PORT)
+    print(
+        f"[STREAM-SERVER] http://{STREAM_SERVER_HOST}:{STREAM_SERVER_PORT}/<mount>, "
+        f"/{NOWPLAYING_JSON}, /{NOWPLAYING_EVENTS}, /{METRICS_PATH}"
+    )
+    ready.set()
+    async with server:
+        await server.serve_forever()
+
+
+def _run(ready: threading.Event) -> None:
+    try:
+        _loop.run_until_complete(_main(ready))
+    except OSError as e:
+        print(f"[STREAM-SERVER] Не запущен: {e}")
+        ready.set()
+
+
+def start_stream_server() -> bool:
+    """Запустить встроенный сервер потока в отдельном потоке (один раз; не поднялся — не повторяем)."""
+    global _loop, _thread
+    with _mounts_lock:
+        if _thread is not None:
+            return _thread.is_alive()
+        watch(_on_metadata)
+        _loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        _thread = threading.Thread(target=_run, args=(ready,), name="stream-server", daemon=True)
+        _thread.start()
+    ready.wait(5)
+    return _thread.is_alive()
@@ -1,149 +1,632 @@
 """
 NAVO RADIO — стриминг в Icecast.
-Один долгоживущий FFmpeg читает MP3 из pipe — бесшовная смена треков без 409.
+Один долгоживущий поток PCM раздаётся энкодерам (services/encoder.py) — бесшовная смена треков без 409,
+несколько mount'ов с разными кодеками и битрейтами из одного декодирования.
 """
+import itertools
 import queue
 import subprocess
 import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
 from pathlib import Path
 
 from config import (
+    CROSSFADE_SECONDS,
+    DECODE_WAIT_TIMEOUT,
+    DUCK_DB,
     FFMPEG_PATH,
+    FILLER_ENABLED,
+    FILLER_WATERMARK_SECONDS,
     ICECAST_HOST,
     ICECAST_MOUNT,
     ICECAST_PASSWORD,
     ICECAST_PORT,
+    METADATA_HTTP_ENABLED,
+    MIX_BUDGET_MS,
+    MIXER_ENABLED,
+    STREAM_SERVER_ENABLED,
+    VOICEOVER_SECONDS,
 )
 
-# Очередь: (intro_path | None, track_path). Feeder пишет в FFmpeg stdin.
-_stream_queue: queue.Queue[tuple[Path | None, Path] | None] = queue.Queue(maxsize=16)
+from .decoder import DecodeJob, LiveDecodeItem, get_pool
+from .encoder import EncoderFanout
+from .filler import FILLER_ITEMS, get_filler
+from .ident import IdentItem, build_ident_async, load_ident
+from .loudness import fade_out
+from .metadata import publish
+from .metrics import RESTARTS, Collected, labels
+from .pcm_cache import BYTES_PER_SECOND, CHUNK_SIZE
+from .stream_server import start_stream_server
+
+
+class SilenceItem:
+    """Элемент очереди «тишина N мс»: нули PCM из заранее выделенного буфера, без FFmpeg."""
+
+    name = "silence"
+    title = None  # тишина не меняет «сейчас в эфире»
+    decoded = True
+
+    def __init__(self, ms: int):
+        self.ms = ms
+        self.played = threading.Event()
+
+    @property
+    def duration(self) -> float:
+        return self.ms / 1000
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return True
+
+    def cancel(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def finish(self) -> None:
+        self.played.set()
+
+    def chunks(self):
+        yield from _silence_chunks(self.duration)
+
+    def parts(self):
+        yield "silence", self.chunks()
+
+
+QueueItem = DecodeJob | LiveDecodeItem | SilenceItem | IdentItem
+
+# Очередь: DecodeJob (intro + track, декодируется заранее пулом), LiveDecodeItem
+# (речь, синтезируемая прямо сейчас) или SilenceItem. Feeder пишет PCM в энкодеры,
+# при пустой очереди — тишину сам; IdentItem feeder играет при старте, до очереди.
+_stream_queue: queue.Queue[QueueItem | None] = queue.Queue(maxsize=16)
 _feeder_thread: threading.Thread | None = None
-_ffmpeg_proc: subprocess.Popen | None = None
+_encoder: EncoderFanout | None = None
 _running = False
+_start_lock = threading.Lock()
+_requeued: QueueItem | None = None
+# Feeder запущен со стартовой заставкой (main не ставит вслед обычную)
+_ident_handed = False
+# Как часто супервизор проверяет, жив ли feeder
+_SUPERVISE_INTERVAL = 0.1
 
+# Один буфер нулей на все паузы — тишина не аллоцирует память и не запускает процессы
+_SILENCE = memoryview(bytes(CHUNK_SIZE))
+# Очередь пуста: ждём элемент столько, затем пишем кусок тишины (энкодер не голодает)
+_UNDERRUN_POLL = 0.1
+_UNDERRUN_FILL_SECONDS = 0.2
+# Сколько следующих элементов показывать в «сейчас в эфире»
+_UPCOMING_TITLES = 3
+# Трек, прерванный на границе часа, затухает за это время (без микшера; с ним — кроссфейд)
+_CUT_FADE_SECONDS = 0.5
 
-def _normalize_and_write(proc_stdin, ffmpeg_exe: str, path: Path) -> bool:
-    """Декодировать в PCM (s16le) — без границ MP3, стабильно при склейке."""
-    try:
-        norm = subprocess.Popen(
-            [
-                ffmpeg_exe,
-                "-y", "-loglevel", "error",
-                "-fflags", "+genpts+discardcorrupt",
-                "-err_detect", "ignore_err",
-                "-i", str(path),
-                "-c:a", "pcm_s16le", "-ar", "44100", "-ac", "1",
-                "-f", "s16le", "-",
-            ],
-            stdin=subprocess.DEVNULL,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.DEVNULL,
-        )
-        if norm.stdout:
-            while chunk := norm.stdout.read(65536):
-                proc_stdin.write(chunk)
-        norm.wait()
-        return norm.returncode == 0
-    except Exception as e:
-        print(f"[STREAMER] Ошибка {path}: {e}")
-        return False
+# Подписка «буфер эфира ниже N сек» — главный цикл спит до этого сигнала
+_watermark: tuple[float, Callable[[], None]] | None = None
+_watermark_lock = threading.Lock()
 
+_cut_item: QueueItem | None = None  # трек в эфире, который надо прервать (cut_music)
+_waiting_decode = False  # feeder ждёт декодирования взятого элемента — резерв не нужен
+# Холодный старт: момент запуска процесса (main.py, до импортов) → первый звук в энкодере
+_launched_at: float | None = None
+_startup_seconds: float | None = None
 
-def _feed_worker() -> None:
-    """Поток: читает из очереди, декодирует в PCM, пишет в FFmpeg stdin."""
-    global _ffmpeg_proc
-    ffmpeg_exe = FFMPEG_PATH if FFMPEG_PATH else "ffmpeg"
-    icecast_url = (
-        f"icecast://source:{ICECAST_PASSWORD}@{ICECAST_HOST}:{ICECAST_PORT}/{ICECAST_MOUNT}"
-    )
-    # PCM в pipe — нет границ MP3, нет "Header missing"
-    cmd = [
-        ffmpeg_exe,
-        "-loglevel", "warning",
-        "-re",
-        "-f", "s16le", "-ar", "44100", "-ac", "1",
-        "-i", "pipe:0",
-        "-c:a", "libmp3lame", "-b:a", "128k",
-        "-content_type", "audio/mpeg", "-f", "mp3",
-        icecast_url,
-    ]
-    proc = subprocess.Popen(
-        cmd,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.PIPE,
+_underruns = 0  # сколько раз очередь оказывалась пустой
+_silence_written = 0  # байт тишины, записанных при underrun и ожидании декодирования
+
+# Кроссфейд / voice-over между частями эфира (MIXER_ENABLED)
+_mixer = None
+if MIXER_ENABLED:
+    # Микшер тянет numpy — импортируем, только когда он включён
+    from .mixer import Mixer
+
+    _mixer = Mixer(CROSSFADE_SECONDS, VOICEOVER_SECONDS, DUCK_DB, MIX_BUDGET_MS)
+
+# Часы эфира: энкодер с -re читает PCM в реальном времени, значит записанные байты = сыгранное время
+_clock_lock = threading.Lock()
+_now_playing: QueueItem | None = None
+_now_written = 0  # байт текущего элемента
+_total_written = 0  # байт с запуска энкодера
+
+
+@dataclass
+class PlayoutStatus:
+    """Состояние эфира по часам feeder."""
+    current: str | None  # что сейчас в эфире
+    position: float  # сек от начала текущего элемента
+    duration: float  # длительность текущего элемента, сек (0 — неизвестна)
+    queued_items: int
+    pending_items: int  # ещё декодируются — длительность пока неизвестна
+    buffered_seconds: float  # остаток текущего + декодированная очередь
+    clock: float  # сек эфира с запуска энкодера
+    underruns: int  # очередь была пуста — в эфир шла тишина
+    silence_fill_seconds: float  # всего секунд такой тишины
+
+
+def _advance_clock(nbytes: int) -> None:
+    global _now_written, _total_written
+    with _clock_lock:
+        _now_written += nbytes
+        _total_written += nbytes
+    if _watermark is not None:
+        _check_watermark()
+    if FILLER_ENABLED:
+        _check_filler()
+
+
+def on_buffer_below(seconds: float, callback: Callable[[], None]) -> bool:
+    """
+    Однократно вызвать callback (из потока feeder'а), когда в буфере эфира останется меньше seconds
+    и ничего не декодируется. Заменяет предыдущую подписку. False — feeder не запущен, сигнала не будет.
+    """
+    global _watermark
+    with _watermark_lock:
+        _watermark = (seconds, callback)
+    return bool(_feeder_thread and _feeder_thread.is_alive())
+
+
+def _check_watermark() -> None:
+    global _watermark
+    st = get_playout_status()
+    with _watermark_lock:
+        mark = _watermark
+        if mark is None or st.pending_items or st.buffered_seconds >= mark[0]:
+            return
+        _watermark = None
+    mark[1]()
+
+
+def _check_filler() -> None:
+    """
+    Буфер эфира ниже FILLER_WATERMARK_SECONDS, а очередь пуста — подготовка не успела.
+    Feeder сам ставит элемент резерва, не дожидаясь главного потока: в эфире звук, а не тишина.
+    """
+    if _waiting_decode or not _stream_queue.empty():
+        return
+    with _clock_lock:
+        current = _now_playing
+        written = _now_written
+    # Длительность живой речи растёт по мере синтеза — её остаток не показателен
+    if isinstance(current, LiveDecodeItem):
+        return
+    remaining = current.duration - written / BYTES_PER_SECOND if current else 0.0
+    if remaining >= FILLER_WATERMARK_SECONDS:
+        return
+    pool = get_filler()
+    path = pool.pick()
+    if path is None:
+        return
+    job = _enqueue(None, path, block=False, title=pool.title_for(path))
+    if job is not None:
+        FILLER_ITEMS.inc(kind=pool.kind(path))
+        print(f"[STREAMER] Буфер пуст — резерв в эфир: {path.name}")
+
+
+def _set_now_playing(job: QueueItem | None) -> None:
+    global _now_playing, _now_written
+    with _clock_lock:
+        _now_playing = job
+        _now_written = 0
+    if FILLER_ENABLED and isinstance(job, DecodeJob):
+        get_filler().note_played(job.track_path, job.title)
+    elif FILLER_ENABLED and isinstance(job, IdentItem):
+        # Резерв не должен повторить заставку сразу после старта
+        get_filler().note_played(job.source, job.title)
+    if job is not None and job.title:
+        with _stream_queue.mutex:
+            upcoming = [j.title for j in _stream_queue.queue if j is not None and j.title]
+        publish(job.title, job.duration, upcoming[:_UPCOMING_TITLES])
+
+
+def get_playout_status() -> PlayoutStatus:
+    """Что в эфире, позиция и сколько секунд аудио уже стоит в очереди."""
+    with _stream_queue.mutex:
+        queued = [j for j in _stream_queue.queue if j is not None]
+    with _clock_lock:
+        current = _now_playing
+        written = _now_written
+        total = _total_written
+    position = written / BYTES_PER_SECOND if current else 0.0
+    duration = current.duration if current else 0.0
+    remaining = max(0.0, duration - position)
+    return PlayoutStatus(
+        current=current.name if current else None,
+        position=position,
+        duration=duration,
+        queued_items=len(queued),
+        pending_items=sum(1 for j in queued if not j.decoded),
+        buffered_seconds=remaining + sum(j.duration for j in queued),
+        clock=total / BYTES_PER_SECOND,
+        underruns=_underruns,
+        silence_fill_seconds=_silence_written / BYTES_PER_SECOND,
     )
-    _ffmpeg_proc = proc
-    assert proc.stdin is not None
 
-    def _read_stderr():
-        if proc.stderr:
-            for line in proc.stderr:
-                s = line.decode("utf-8", errors="replace").strip()
-                if s:
-                    print(f"[FFmpeg] {s}")
 
-    threading.Thread(target=_read_stderr, daemon=True).start()
+def _output_values(field: str) -> dict:
+    """Значение поля каждого выхода энкодера с метками mount/codec/target."""
+    out = _encoder
+    return {
+        labels(mount=o.spec.mount, codec=o.spec.codec, target=o.spec.target): float(getattr(o, field))
+        for o in (out.outputs if out else [])
+    }
+
+
+# Метрики эфира снимаются с часов feeder'а в момент запроса
+Collected("navo_queue_items", "Элементов в очереди эфира", lambda: get_playout_status().queued_items)
+Collected(
+    "navo_queue_pending_items",
+    "Элементов очереди, ещё не декодированных",
+    lambda: get_playout_status().pending_items,
+)
+Collected("navo_queue_seconds", "Секунд аудио в буфере эфира", lambda: get_playout_status().buffered_seconds)
+Collected(
+    "navo_startup_seconds",
+    "От запуска процесса до первого звука в энкодере (0 — ещё не было)",
+    lambda: _startup_seconds or 0.0,
+)
+Collected("navo_underruns_total", "Сколько раз очередь эфира была пуста", lambda: _underruns, kind="counter")
+Collected(
+    "navo_silence_fill_seconds_total",
+    "Секунд тишины, записанных вместо пустой очереди",
+    lambda: _silence_written / BYTES_PER_SECOND,
+    kind="counter",
+)
+Collected(
+    "navo_encoder_written_bytes_total",
+    "Байт PCM, переданных энкодерам (rate() — пропускная способность)",
+    lambda: _total_written,
+    kind="counter",
+)
+Collected(
+    "navo_encoder_restarts_total",
+    "Перезапуски энкодеров по выходам",
+    lambda: _output_values("restarts"),
+    kind="counter",
+)
+Collected("navo_encoder_up", "Выход энкодера работает (1) или перезапускается (0)", lambda: _output_values("alive"))
+Collected(
+    "navo_encoder_skipped_seconds_total",
+    "Секунд звука, пропущенных выходом при переподключении (не уместилось в буфер)",
+    lambda: _output_values("skipped_seconds"),
+    kind="counter",
+)
+
+
+def _silence_chunks(seconds: float):
+    """Куски тишины общей длиной seconds (кратно сэмплу)."""
+    remaining = int(seconds * BYTES_PER_SECOND) // 2 * 2
+    while remaining > 0:
+        n = min(remaining, len(_SILENCE))
+        yield _SILENCE[:n]
+        remaining -= n
+
+
+def mark_launch(started: float) -> None:
+    """Запомнить момент запуска (time.perf_counter() в начале main.py) для замера холодного старта."""
+    global _launched_at
+    _launched_at = started
+
+
+def _note_first_audio() -> None:
+    global _startup_seconds
+    if _launched_at is not None:
+        _startup_seconds = time.perf_counter() - _launched_at
+        print(f"[STARTUP] Первый звук в энкодере через {_startup_seconds * 1000:.0f} мс после запуска")
+
+
+def _write_item(out, item: QueueItem) -> None:
+    """Скопировать готовый PCM элемента в энкодеры (через микшер, если включён), двигая часы эфира."""
+    if _mixer is None:
+        chunks = item.chunks()
+    else:
+        chunks = (out for role, part in item.parts() for out in _mixer.feed(role, part))
+    for chunk in chunks:
+        if _cut_item is item:
+            _cut(out, item, itertools.chain([chunk], chunks))
+            return
+        if _startup_seconds is None:
+            _note_first_audio()
+        out.write(chunk)
+        _advance_clock(len(chunk))
+
+
+def _cut(out, item: QueueItem, rest) -> None:
+    """Прервать элемент: без микшера — короткое затухание, с микшером удержанный хвост уйдёт в кроссфейд."""
+    global _cut_item
+    _cut_item = None
+    if _mixer is None:
+        for chunk in fade_out(rest, _CUT_FADE_SECONDS):
+            out.write(chunk)
+            _advance_clock(len(chunk))
+    print(f"[STREAMER] Прерван на границе часа: {item.name}")
+
+
+def _is_music(item: QueueItem | None) -> bool:
+    """Музыкальный трек (из конвейера или резерва): его можно прервать и обогнать в очереди."""
+    return isinstance(item, DecodeJob) and item.track_path.name.startswith("track_")
+
+
+def cut_music() -> bool:
+    """
+    Прервать трек или паузу, которые сейчас в эфире (заставка/якорь часа): следующий элемент очереди
+    звучит сразу. False — в эфире речь, подкаст или заставка — их не прерываем.
+    """
+    global _cut_item
+    with _clock_lock:
+        current = _now_playing
+    if not (_is_music(current) or isinstance(current, SilenceItem)):
+        return False
+    _cut_item = current
+    return True
 
+
+def _fill_silence(out, seconds: float) -> None:
+    """Тишина вместо пустоты: очередь пуста или элемент ещё декодируется."""
+    global _silence_written
+    if _mixer is not None:
+        # Перекрывать не с чем — удержанный хвост уходит в эфир как есть
+        for chunk in _mixer.flush():
+            out.write(chunk)
+            _advance_clock(len(chunk))
+    for chunk in _silence_chunks(seconds):
+        out.write(chunk)
+        _advance_clock(len(chunk))
+        _silence_written += len(chunk)
+
+
+def _next_item(out) -> QueueItem | None:
+    """Следующий элемент очереди; пока его нет — тишина в энкодер."""
+    global _underruns
+    starved = False
+    while _running:
+        try:
+            return _stream_queue.get(timeout=_UNDERRUN_POLL)
+        except queue.Empty:
+            if not starved:
+                starved = True
+                _underruns += 1
+            _fill_silence(out, _UNDERRUN_FILL_SECONDS)
+    return None
+
+
+def _wait_decoded(out, item: QueueItem) -> bool:
+    """Ждать декодирования, заполняя эфир тишиной. False — не успели за DECODE_WAIT_TIMEOUT."""
+    global _waiting_decode
+    deadline = time.monotonic() + DECODE_WAIT_TIMEOUT
+    _waiting_decode = True
+    try:
+        while not item.wait(_UNDERRUN_POLL):
+            if time.monotonic() >= deadline:
+                return False
+            _fill_silence(out, _UNDERRUN_FILL_SECONDS)
+        return True
+    finally:
+        _waiting_decode = False
+
+
+def _play_ident(out, ident: IdentItem) -> None:
+    """Стартовая заставка из готового PCM — в энкодер сразу, пока очередь только наполняется."""
+    _set_now_playing(ident)
     try:
+        _write_item(out, ident)
+    except OSError as e:
+        print(f"[STREAMER] Стартовая заставка: {e}")
+    finally:
+        _set_now_playing(None)
+
+
+def _requeue_front(item: QueueItem) -> None:
+    """
+    Вернуть взятый, но не начатый элемент в начало очереди (feeder упал до записи).
+    Один раз: если на нём feeder падает снова — элемент отбрасывается, а не роняет эфир по кругу.
+    """
+    global _requeued
+    if item is _requeued:
+        print(f"[STREAMER] Элемент снова уронил feeder, пропуск: {item.name}")
+        item.cancel()
+        item.finish()
+        return
+    _requeued = item
+    with _stream_queue.mutex:
+        _stream_queue.queue.appendleft(item)
+        _stream_queue.unfinished_tasks += 1
+        _stream_queue.not_empty.notify()
+
+
+def _feed_worker(out: EncoderFanout, ident: IdentItem | None = None) -> None:
+    """Поток: берёт из очереди готовый PCM (декодирует пул) и раздаёт его энкодерам. Пустоту заполняет тишиной."""
+    item: QueueItem | None = None
+    try:
+        if ident is not None:
+            _play_ident(out, ident)
+            # Заставка отыграла — обновляем готовый PCM к следующему запуску (сменилась / измерена громкость)
+            build_ident_async()
         while _running:
-            item = _stream_queue.get()
+            item = _next_item(out)
             if item is None:
                 break
-            intro_path, track_path = item
-            files = []
-            if intro_path and intro_path.exists():
-                files.append(intro_path)
-            if not track_path.exists():
-                print(f"[STREAMER] Файл не найден, пропуск: {track_path}")
+            if not _wait_decoded(out, item):
+                print(f"[STREAMER] Декодирование не успело, пропуск: {item.name}")
+                item.cancel()
+                item.finish()
+                item = None
                 continue
-            files.append(track_path)
-            for p in files:
-                if not _normalize_and_write(proc.stdin, ffmpeg_exe, p):
-                    break
-            proc.stdin.flush()
-    except BrokenPipeError:
-        print("[STREAMER] FFmpeg pipe closed (Icecast disconnect?)")
+            _set_now_playing(item)
+            current, item = item, None
+            try:
+                _write_item(out, current)
+            except Exception as e:
+                # Сбой одного элемента (чтение файла, микшер) — остаток пропускаем, эфир продолжается
+                print(f"[STREAMER] Ошибка элемента {current.name}: {e}")
+            finally:
+                current.close()
+                current.finish()
+                _set_now_playing(None)
     except Exception as e:
         print(f"[STREAMER] Feeder error: {e}")
-    finally:
-        try:
-            proc.stdin.close()
-        except Exception:
-            pass
-        proc.wait()
-        _ffmpeg_proc = None
+        if item is not None:
+            _requeue_front(item)
 
 
-def start_continuous_stream() -> bool:
-    """Запустить непрерывный стрим. Перезапускает feeder при падении."""
-    global _feeder_thread, _running
-    if not ICECAST_PASSWORD:
+def _start_feeder(ident: IdentItem | None = None) -> None:
+    global _feeder_thread
+    _feeder_thread = threading.Thread(target=_feed_worker, args=(_encoder, ident), name="feeder", daemon=True)
+    _feeder_thread.start()
+
+
+def _supervise() -> None:
+    """
+    Feeder упал — перезапуск сразу, не дожидаясь следующего вызова start_continuous_stream().
+    Очередь и энкодеры (с соединениями Icecast) живут отдельно от потока feeder'а и не теряются.
+    """
+    while _running:
+        time.sleep(_SUPERVISE_INTERVAL)
+        with _start_lock:
+            if _running and _feeder_thread and not _feeder_thread.is_alive():
+                print("[STREAMER] Feeder перезапуск после сбоя")
+                RESTARTS.inc(component="feeder")
+                _start_feeder()
+
+
+def startup_ident_played() -> bool:
+    """Feeder получил стартовую заставку при запуске — она уже в эфире (или отыграла)."""
+    return _ident_handed
+
+
+def start_continuous_stream(startup_ident: bool = False) -> bool:
+    """
+    Запустить непрерывный стрим. Перезапускает feeder при падении.
+    startup_ident — при запуске feeder'а первой сыграть готовую стартовую заставку (services/ident.py).
+    """
+    global _encoder, _running, _ident_handed
+    if not ICECAST_PASSWORD and not STREAM_SERVER_ENABLED:
         print("[STREAMER] ICECAST_PASSWORD не задан")
         return False
-    if _feeder_thread and _feeder_thread.is_alive():
-        return True
-    # Feeder умер — перезапускаем (восстановление после сбоя Icecast/FFmpeg)
-    if _feeder_thread and not _feeder_thread.is_alive():
-        print("[STREAMER] Feeder перезапуск после сбоя")
-    _running = True
-    _feeder_thread = threading.Thread(target=_feed_worker, daemon=True)
-    _feeder_thread.start()
+    if STREAM_SERVER_ENABLED or METADATA_HTTP_ENABLED:
+        # Без сервера локальному выходу некуда отдавать поток; «сейчас в эфире» — необязательно
+        if not start_stream_server() and STREAM_SERVER_ENABLED:
+            return False
+    with _start_lock:
+        if _feeder_thread:
+            # Запущен; упавший feeder перезапускает _supervise
+            return True
+        if FILLER_ENABLED:
+            # Резерв собирается и декодируется в фоне заранее — к первому провалу уже готов
+            get_filler()
+        ident = load_ident() if startup_ident else None
+        if startup_ident and ident is None:
+            # Первый запуск: готовой заставки ещё нет — соберём к следующему
+            build_ident_async()
+        # Один PCM-поток на все выходы (mount/кодек/битрейт из STREAM_OUTPUTS)
+        _encoder = EncoderFanout()
+        _running = True
+        _ident_handed = ident is not None
+        _start_feeder(ident)
+        threading.Thread(target=_supervise, name="feeder-supervisor", daemon=True).start()
     return True
 
 
-def enqueue_track(intro_path: Path | None, track_path: Path, block: bool = True) -> bool:
-    """Добавить трек в очередь. block=False — не ждать при переполнении."""
-    try:
+def _put(item: QueueItem, block: bool, priority: bool) -> None:
+    """
+    Поставить элемент в очередь (queue.Full — не поместился).
+    priority — перед треками, ждущими эфира (заставка и якорь часа не ждут музыку): таких элементов
+    единицы, поэтому они встают и сверх maxsize. Трек в эфире (в том числе из резерва, начатый,
+    пока якорь готовился) прерывается — элемент звучит сразу, а не после него.
+    """
+    if not priority:
         if block:
-            _stream_queue.put((intro_path, track_path), timeout=120)
+            _stream_queue.put(item, timeout=120)
         else:
-            _stream_queue.put_nowait((intro_path, track_path))
+            _stream_queue.put_nowait(item)
+        return
+    with _stream_queue.mutex:
+        pending = _stream_queue.queue
+        index = next((i for i, j in enumerate(pending) if _is_music(j)), len(pending))
+        pending.insert(index, item)
+        _stream_queue.unfinished_tasks += 1
+        _stream_queue.not_empty.notify()
+    cut_music()
+
+
+def _enqueue(
+    intro_path: Path | None,
+    track_path: Path,
+    block: bool = True,
+    title: str | None = None,
+    priority: bool = False,
+) -> DecodeJob | None:
+    # Декодирование стартует сразу — к моменту эфира PCM уже готов
+    job = get_pool().submit(DecodeJob(intro_path, track_path, title))
+    try:
+        _put(job, block, priority)
+        return job
+    except queue.Full:
+        job.cancel()
+        job.finish()
+        return None
+
+
+def enqueue_track(
+    intro_path: Path | None,
+    track_path: Path,
+    block: bool = True,
+    title: str | None = None,
+    priority: bool = False,
+) -> bool:
+    """
+    Добавить трек в очередь. block=False — не ждать при переполнении. title — для «сейчас в эфире».
+    priority — перед треками, которые ещё ждут эфира (заставка, якорные блоки); трек в эфире прерывается.
+    """
+    return _enqueue(intro_path, track_path, block, title, priority) is not None
+
+
+def enqueue_silence(ms: int, block: bool = False, priority: bool = False) -> bool:
+    """
+    Поставить в очередь тишину на ms миллисекунд (без декодирования файлов).
+    priority — как у enqueue_track: пауза перед якорем, которую прервёт сам якорь, как только встанет в очередь.
+    """
+    try:
+        _put(SilenceItem(ms), block, priority)
         return True
     except queue.Full:
         return False
 
 
+def enqueue_live(
+    name: str = "live", block: bool = True, title: str | None = None, priority: bool = False
+) -> LiveDecodeItem | None:
+    """
+    Поставить в очередь речь, которая ещё синтезируется: MP3 передаётся через item.write(),
+    конец — item.end_input(). В эфир выходит после джиттер-буфера, не дожидаясь всего файла.
+    priority — как у enqueue_track.
+    """
+    try:
+        item = LiveDecodeItem(name, title)
+    except OSError as e:
+        print(f"[STREAMER] Живой декодер не запущен: {e}")
+        return None
+    try:
+        _put(item, block, priority)
+        return item
+    except queue.Full:
+        item.cancel()
+        item.finish()
+        return None
+
+
+class _QueuedProc:
+    """Элемент непрерывного стрима с интерфейсом Popen: wait() — до конца проигрывания."""
+
+    def __init__(self, job: DecodeJob | None):
+        self._job = job
+        self.returncode = 0 if job else 1
+
+    def wait(self, timeout: float | None = None) -> int:
+        if self._job:
+            self._job.played.wait(timeout)
+        return self.returncode
+
+
 def stream_to_icecast(
     intro_path: Path | None,
     track_path: Path,
@@ -153,13 +636,8 @@ def stream_to_icecast(
     Иначе — fallback на старый способ (отдельный FFmpeg на трек).
     """
     if _running and _feeder_thread and _feeder_thread.is_alive():
-        enqueue_track(intro_path, track_path)
-        # Возвращаем фейковый процесс, который "ждёт" пока трек отыграет
-        # Для run_music_track нужен proc.wait() — но мы не ждём, трек в очереди
-        class _FakeProc:
-            returncode = 0
-            def wait(self): pass
-        return _FakeProc()  # type: ignore
+        # wait() ждёт реального окончания элемента по часам feeder
+        return _QueuedProc(_enqueue(intro_path, track_path))  # type: ignore
 
     # Fallback: один раз на трек (для обратной совместимости)
     return _stream_single(intro_path, track_path)
@@ -1,55 +1,257 @@
 """
 NAVO RADIO — TTS (Text-to-Speech).
 Edge TTS по умолчанию, ElevenLabs опционально.
+Кэш по содержимому: одна и та же фраза тем же голосом синтезируется один раз.
+Синтез — на долгоживущем event loop в отдельном потоке: несколько фраз параллельно
+(до TTS_CONCURRENCY), вызывающий поток получает Future.
+Потоковый режим отдаёт куски MP3 по мере синтеза — речь выходит в эфир, не дожидаясь всего файла.
 """
 import asyncio
+import hashlib
+import threading
+import unicodedata
+from collections.abc import Callable
+from concurrent.futures import Future, TimeoutError
 from pathlib import Path
 
-from config import CACHE_DIR, ELEVENLABS_API_KEY, TTS_PROVIDER
+from config import CACHE_DIR, ELEVENLABS_API_KEY, TTS_CONCURRENCY, TTS_PROVIDER, TTS_TIMEOUT
+
+from .cache_manager import commit_file, temp_path, touch
+from .downloader import get_session
+from .metrics import CACHE_LOOKUPS, STAGE_SECONDS
 
 # Русский голос Edge TTS (мужской, нейтральный)
 EDGE_VOICE = "ru-RU-DmitryNeural"
+ELEVENLABS_VOICE = "EXAVITQu4vr4xnSDxMaL"
+ELEVENLABS_MODEL = "eleven_multilingual_v2"
+
+# Синтез в работе: повторный запрос той же фразы получает тот же Future
+_inflight: dict[str, Future] = {}
+_lock = threading.Lock()
+# Куски готового файла для потокового слушателя, пришедшего к уже идущему синтезу
+_REPLAY_CHUNK = 4096
+
+
+class _TTSEngine:
+    """Event loop в отдельном потоке; задания принимаются из любого потока."""
+
+    def __init__(self, concurrency: int):
+        self._loop = asyncio.new_event_loop()
+        self._sem = asyncio.Semaphore(max(1, concurrency))
+        self._thread = threading.Thread(target=self._loop.run_forever, name="tts-engine", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str, output_path: Path) -> Future:
+        return asyncio.run_coroutine_threadsafe(self._synthesize(text, output_path), self._loop)
+
+    def submit_stream(self, text: str, output_path: Path, sink: Callable[[bytes], None]) -> Future:
+        return asyncio.run_coroutine_threadsafe(self._synthesize(text, output_path, sink), self._loop)
+
+    async def _synthesize(
+        self, text: str, output_path: Path, sink: Callable[[bytes], None] | None = None
+    ) -> Path:
+        async with self._sem:
+            # Синтез во временный файл — оборванный синтез не подменит готовый файл
+            tmp = temp_path(output_path)
+            try:
+                with STAGE_SECONDS.time(stage="tts"):
+                    if _use_elevenlabs():
+                        # HTTP-клиент синхронный — в пуле потоков, соединения из общей Session
+                        await self._loop.run_in_executor(None, _elevenlabs_tts, text, tmp, sink)
+                    else:
+                        await _edge_tts(text, tmp, sink)
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+            # Вытеснение по бюджету сканирует CACHE_DIR — не на event loop, остальные синтезы не ждут
+            await self._loop.run_in_executor(None, commit_file, tmp, output_path)
+        return output_path
+
+
+_engine: _TTSEngine | None = None
+
+
+def _get_engine() -> _TTSEngine:
+    global _engine
+    with _lock:
+        if _engine is None:
+            _engine = _TTSEngine(TTS_CONCURRENCY)
+        return _engine
 
 
-async def _edge_tts(text: str, output_path: Path) -> None:
-    """Озвучить текст через Edge TTS."""
+async def _edge_tts(text: str, output_path: Path, sink: Callable[[bytes], None] | None = None) -> None:
+    """Озвучить текст через Edge TTS. sink получает куски MP3 по мере синтеза."""
     import edge_tts
 
     communicate = edge_tts.Communicate(text, EDGE_VOICE)
-    await communicate.save(str(output_path))
+    if sink is None:
+        await communicate.save(str(output_path))
+        return
+    with open(output_path, "wb") as f:
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                f.write(chunk["data"])
+                sink(chunk["data"])
+
+
+def _use_elevenlabs() -> bool:
+    return TTS_PROVIDER == "elevenlabs" and bool(ELEVENLABS_API_KEY)
+
+
+def _normalize(text: str) -> str:
+    """Нормализация для ключа: Unicode NFC, пробелы схлопнуты."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def tts_cache_key(text: str) -> str:
+    """Ключ кэша: текст + провайдер + голос + модель."""
+    if _use_elevenlabs():
+        voice = f"elevenlabs|{ELEVENLABS_VOICE}|{ELEVENLABS_MODEL}"
+    else:
+        voice = f"edge|{EDGE_VOICE}|-"
+    return hashlib.sha1(f"{voice}\n{_normalize(text)}".encode("utf-8")).hexdigest()[:20]
+
+
+def _hit() -> None:
+    """Попадание в кэш TTS — метрика navo_cache_lookups_total{cache="tts"} (/metrics)."""
+    CACHE_LOOKUPS.inc(cache="tts", result="hit")
+
+
+def _miss() -> None:
+    CACHE_LOOKUPS.inc(cache="tts", result="miss")
 
 
-def text_to_speech(text: str, filename: str = "intro.mp3") -> Path:
+def _output_path(text: str) -> Path:
+    return CACHE_DIR / f"tts_{tts_cache_key(text)}.mp3"
+
+
+def cached_tts_path(text: str) -> Path | None:
+    """Готовый файл фразы из кэша или None."""
+    path = _output_path(text)
+    if path.exists():
+        _hit()
+        touch(path)
+        return path
+    return None
+
+
+def _start(key: str, submit: Callable[[], Future]) -> tuple[Future, bool]:
+    """Синтез фразы: уже идущий или новый. (Future, True — запущен этим вызовом)."""
+    with _lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future, False
+        future = _inflight[key] = submit()
+    # Вне _lock: синтез мог уже закончиться, тогда _forget вызывается сразу в этом потоке
+    future.add_done_callback(lambda _f, k=key: _forget(k))
+    return future, True
+
+
+def _replay(future: Future, sink: Callable[[bytes], None]) -> Future:
+    """Та же фраза уже синтезируется без потока — отдать в sink готовый файл целиком."""
+    result: Future = Future()
+
+    def _done(f: Future) -> None:
+        try:
+            path = f.result()
+            with open(path, "rb") as src:
+                while chunk := src.read(_REPLAY_CHUNK):
+                    sink(chunk)
+        except Exception as e:
+            result.set_exception(e)
+        else:
+            result.set_result(path)
+
+    future.add_done_callback(_done)
+    return result
+
+
+def stream_tts(text: str, sink: Callable[[bytes], None]) -> Future:
     """
-    Озвучить текст, сохранить в кэш.
-    Возвращает путь к файлу.
+    Синтезировать фразу, отдавая куски MP3 в sink по мере готовности (вызов — из потока TTS).
+    Файл всё равно сохраняется в кэш; Future → путь к mp3. Кэш не проверяется — см. cached_tts_path.
+    Та же фраза уже в работе — второй синтез не запускается, sink получает её файл по готовности.
     """
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    output_path = CACHE_DIR / filename
+    output_path = _output_path(text)
+    engine = _get_engine()
+    future, started = _start(tts_cache_key(text), lambda: engine.submit_stream(text, output_path, sink))
+    if not started:
+        _hit()
+        return _replay(future, sink)
+    _miss()
+    return future
 
-    if TTS_PROVIDER == "elevenlabs" and ELEVENLABS_API_KEY:
-        _elevenlabs_tts(text, output_path)
-    else:
-        asyncio.run(_edge_tts(text, output_path))
 
-    return output_path
+def submit_tts(text: str) -> Future:
+    """
+    Поставить фразу на синтез, не блокируя поток. Future → путь к mp3.
+    Фраза из кэша — сразу готовый Future.
+    """
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    key = tts_cache_key(text)
+    output_path = _output_path(text)
+
+    with _lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future
+    if output_path.exists():
+        _hit()
+        touch(output_path)
+        done: Future = Future()
+        done.set_result(output_path)
+        return done
+
+    engine = _get_engine()
+    # Между проверками фразу мог поставить другой поток — тогда его Future
+    future, started = _start(key, lambda: engine.submit(text, output_path))
+    if started:
+        _miss()
+    return future
+
 
+def _forget(key: str) -> None:
+    with _lock:
+        _inflight.pop(key, None)
 
-def _elevenlabs_tts(text: str, output_path: Path) -> None:
-    """Озвучить через ElevenLabs API."""
-    import requests
 
-    url = "https://api.elevenlabs.io/v1/text-to-speech/EXAVITQu4vr4xnSDxMaL"
+def text_to_speech(text: str) -> Path:
+    """
+    Озвучить текст, сохранить в кэш.
+    Возвращает путь к файлу. Повторная фраза (тот же голос) — сразу из кэша.
+    Синтез дольше TTS_TIMEOUT отменяется — TimeoutError.
+    """
+    future = submit_tts(text)
+    try:
+        return future.result(timeout=TTS_TIMEOUT)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+
+def _elevenlabs_tts(text: str, output_path: Path, sink: Callable[[bytes], None] | None = None) -> None:
+    """Озвучить через ElevenLabs API. С sink — потоковый эндпоинт, куски MP3 по мере синтеза."""
+    url = f"https://api.elevenlabs.io/v1/text-to-speech/{ELEVENLABS_VOICE}"
     headers = {
         "xi-api-key": ELEVENLABS_API_KEY,
         "Content-Type": "application/json",
     }
     data = {
         "text": text,
-        "model_id": "eleven_multilingual_v2",
+        "model_id": ELEVENLABS_MODEL,
     }
 
-    resp = requests.post(url, json=data, headers=headers, timeout=30)
+    if sink is not None:
+        with get_session().post(f"{url}/stream", json=data, headers=headers, timeout=30, stream=True) as resp:
+            resp.raise_for_status()
+            with open(output_path, "wb") as f:
+                for chunk in resp.iter_content(chunk_size=4096):
+                    f.write(chunk)
+                    sink(chunk)
+        return
+
+    resp = get_session().post(url, json=data, headers=headers, timeout=30)
     resp.raise_for_status()
 
     with open(output_path, "wb") as f:
@@ -2,11 +2,13 @@
 NAVO RADIO — блок погоды.
 WeatherAPI.com (Душанбе) → Groq → TTS → эфир.
 """
-import requests
+from pathlib import Path
 
 from config import WEATHER_API_KEY
 
-from .groq_client import generate_weather_script
+from .groq_client import WEATHER_UNAVAILABLE, generate_weather_script
+from .ingest import fetch, script_for
+from .live_speech import speak
 from .streamer import enqueue_track, start_continuous_stream
 from .tts import text_to_speech
 
@@ -15,42 +17,61 @@ LAT, LON = 38.54, 68.78
 WEATHER_API_URL = "https://api.weatherapi.com/v1/current.json"
 
 
-def _fetch_weather_data() -> str:
-    """Получить данные погоды."""
+def _parse_weather(resp) -> str:
+    """
+    Текст для сценария. Значения округлены (температура до градуса, ветер до 5 км/ч) —
+    колебания в десятые доли не меняют отпечаток и не заставляют переписывать прогноз.
+    """
+    data = resp.json()
+    current = data.get("current", {})
+    loc = data.get("location", {})
+    temp = current.get("temp_c")
+    temp = round(temp) if isinstance(temp, (int, float)) else "?"
+    condition = current.get("condition", {}).get("text", "")
+    wind = 5 * round((current.get("wind_kph") or 0) / 5)
+    return f"Город: {loc.get('name', 'Душанбе')}. Температура {temp}°C. {condition}. Ветер {wind} км/ч."
+
+
+def fetch_weather_data() -> str:
+    """Получить данные погоды (условный запрос: данные не менялись — прошлый текст)."""
     if not WEATHER_API_KEY:
         return ""
+    return fetch(
+        "weather",
+        WEATHER_API_URL,
+        _parse_weather,
+        params={"key": WEATHER_API_KEY, "q": f"{LAT},{LON}", "lang": "ru"},
+        timeout=10,
+    )
 
-    try:
-        resp = requests.get(
-            WEATHER_API_URL,
-            params={"key": WEATHER_API_KEY, "q": f"{LAT},{LON}", "lang": "ru"},
-            timeout=10,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        current = data.get("current", {})
-        loc = data.get("location", {})
-        temp = current.get("temp_c", "?")
-        condition = current.get("condition", {}).get("text", "")
-        wind = current.get("wind_kph", 0)
-        return f"Город: {loc.get('name', 'Душанбе')}. Температура {temp}°C. {condition}. Ветер {wind} км/ч."
-    except Exception as e:
-        print(f"[WEATHER] API ошибка: {e}")
-        return ""
+
+def weather_script() -> str:
+    """Сценарий прогноза: погода по существу не изменилась — прежний сценарий, без Groq."""
+    return script_for("weather", fetch_weather_data(), generate_weather_script, WEATHER_UNAVAILABLE)
 
 
-def run_weather_block() -> bool:
-    """Прогноз погоды. Возвращает True если успешно."""
-    weather_data = _fetch_weather_data()
-    script = generate_weather_script(weather_data)
+def render_weather_block() -> Path | None:
+    """Подготовить прогноз погоды (API → Groq → TTS), не ставя в эфир."""
+    script = weather_script()
 
     try:
-        path = text_to_speech(script, filename="weather_latest.mp3")
+        return text_to_speech(script)
     except Exception as e:
         print(f"[WEATHER] TTS ошибка: {e}")
+        return None
+
+
+def run_weather_block(path: Path | None = None) -> bool:
+    """Прогноз погоды. path — заранее подготовленный прогноз. Возвращает True если успешно."""
+    if path is None:
+        # Готового файла нет — речь идёт в эфир по мере синтеза
+        script = weather_script()
+        if speak(script, name="weather", title="Погода", priority=True):
+            print("[WEATHER] Прогноз погоды (потоково)")
+            return True
         return False
 
-    if start_continuous_stream() and enqueue_track(None, path):
+    if start_continuous_stream() and enqueue_track(None, path, title="Погода", priority=True):
         print("[WEATHER] Прогноз погоды")
         return True
     return False
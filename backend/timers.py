@@ -0,0 +1,49 @@
+"""
+NAVO RADIO — ядро событий главного цикла.
+Куча таймеров (heapq по monotonic) плюс события из других потоков: главный поток спит
+до ближайшей границы расписания или до сигнала feeder'а «буфер эфира почти пуст».
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+
+class TimerHeap:
+    """Таймеры и внешние события; wait() возвращает ближайшее сработавшее."""
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._events: deque[str] = deque()
+        self._cond = threading.Condition()
+
+    def call_later(self, delay: float, event: str) -> None:
+        """Событие через delay секунд."""
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + max(0.0, delay), next(self._seq), event))
+            self._cond.notify()
+
+    def notify(self, event: str) -> None:
+        """Событие прямо сейчас (из любого потока)."""
+        with self._cond:
+            self._events.append(event)
+            self._cond.notify()
+
+    def cancel(self, event: str) -> None:
+        """Снять все ещё не сработавшие таймеры события."""
+        with self._cond:
+            self._heap = [t for t in self._heap if t[2] != event]
+            heapq.heapify(self._heap)
+
+    def wait(self) -> str:
+        """Спать до ближайшего события и вернуть его."""
+        with self._cond:
+            while True:
+                if self._events:
+                    return self._events.popleft()
+                now = time.monotonic()
+                if self._heap and self._heap[0][0] <= now:
+                    return heapq.heappop(self._heap)[2]
+                self._cond.wait(self._heap[0][0] - now if self._heap else None)
@@ -48,6 +48,10 @@ type Lang = keyof typeof translations;
 const STREAM_URL =
   "https://stream.zeno.fm/0r0xa792kwzuv";
 
+/* ─── Now-playing events from backend (METADATA_HTTP_ENABLED) ───
+   Empty — no live titles: the player shows the station name instead. */
+const NOWPLAYING_EVENTS_URL = process.env.NEXT_PUBLIC_NOWPLAYING_URL ?? "";
+
 export default function RadioPlayer() {
   const [lang, setLang] = useState<Lang>("ru");
   const [isPlaying, setIsPlaying] = useState(false);
@@ -88,22 +92,19 @@ export default function RadioPlayer() {
     }
   }, [volume]);
 
-  /* ─── Simulated song title (replace with metadata endpoint) ─── */
+  /* ─── Now playing: push from backend (SSE), no polling ─── */
   useEffect(() => {
-    const songs = [
-      "Shahriyor - Modaram",
-      "Farrux Xamrayev - Yor-Yor",
-      "Manizha - Sabo",
-      "Nigina Amonqulova - Oshiq",
-      "Sadriddin - Majnun",
-      "Talib Tale - Gozlerin",
-    ];
-    setCurrentSong(songs[0]);
-    const interval = setInterval(() => {
-      const idx = Math.floor(Math.random() * songs.length);
-      setCurrentSong(songs[idx]);
-    }, 30000);
-    return () => clearInterval(interval);
+    if (!NOWPLAYING_EVENTS_URL) return;
+    const events = new EventSource(NOWPLAYING_EVENTS_URL);
+    events.onmessage = (e) => {
+      try {
+        const data = JSON.parse(e.data) as { title: string | null };
+        if (data.title) setCurrentSong(data.title);
+      } catch {
+        /* ignore malformed event */
+      }
+    };
+    return () => events.close();
   }, []);
 
   /* ─── Equalizer canvas drawing ─── */
@@ -405,7 +406,7 @@ export default function RadioPlayer() {
             key={currentSong}
             className="animate-fade-in text-balance text-center text-lg font-medium text-foreground md:text-xl"
           >
-            {currentSong || t.loading}
+            {currentSong || (NOWPLAYING_EVENTS_URL ? t.loading : t.title)}
           </p>
         </div>
       </div>